@@ -0,0 +1,186 @@
+"""
+Filename: bench.py
+
+Author: Brian Held
+
+Benchmarks of the hot paths of the learning model (production, allocation, simulation) and of the career model's
+Bellman operator across problem sizes, saved as JSON and compared against a baseline run
+
+Usage
+-----
+python bench.py run [--out bench.json] [--quick]
+python bench.py compare baseline.json bench.json [--threshold 0.2]
+
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+import numpy as np
+
+import model
+
+# Composition of benchmark workforces (new, low, high, neg, pos), close to the long-run composition of simt
+SHARES = np.array([0.35, 0.2, 0.07, 0.01, 0.37])
+
+
+def environment():
+    """
+    Metadata of the machine and code a benchmark ran on
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'platform': platform.platform(), 'processor': platform.processor(),
+            'cpu_count': os.cpu_count(), 'commit': commit}
+
+
+def timed(fn, repeat=5):
+    """
+    Best time in seconds of one call of fn over repeat runs, each of enough calls to take at least 0.2 s
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def workforce(n):
+    """
+    Worker state (new, low, high, neg, pos) of about n workers in the proportions of SHARES
+    """
+    return tuple(int(x) for x in np.maximum(np.round(SHARES * n), 1))
+
+
+def bench_prod(m, sizes, repeat):
+    alloc = np.array(m.allocate(*workforce(100))[0], dtype=float)
+    results = {'prod/scalar': {'seconds': timed(lambda: m.prod(*alloc), repeat), 'n': 1}}
+    for n in sizes:
+        batch = np.tile(alloc, (n, 1))
+        results['prod/batch/n={}'.format(n)] = {'seconds': timed(lambda: m.prod_batch(batch), repeat), 'n': n}
+    return results
+
+
+def bench_allocate(m, sizes, max_greedy, repeat):
+    results = {}
+    for n in sizes:
+        state = workforce(n)
+        for method in ('greedy', 'search'):
+            if method == 'greedy' and n > max_greedy:
+                continue
+            results['allocate/{}/n={}'.format(method, n)] = {
+                'seconds': timed(lambda: m.allocate(*state, method=method), repeat), 'n': n}
+    return results
+
+
+def bench_simt(m, horizons, repeat):
+    results = {}
+    for t in horizons:
+        # every call simulates the same path
+        results['simt/t={}'.format(t)] = {
+            'seconds': timed(lambda: (np.random.seed(0), m.simt(100, 0, 0, 0, 0, time=t)), repeat), 'n': t}
+    return results
+
+
+def bench_bellman(sizes, repeat):
+    from test import CareerWorkerProblem
+
+    results = {}
+    for n in sizes:
+        cp = CareerWorkerProblem(N=n)
+        v = np.full((n, n), 100.0)
+        results['bellman/N={}'.format(n)] = {'seconds': timed(lambda: cp.bellman_operator(v), repeat), 'n': n}
+    return results
+
+
+def run(quick=False, max_greedy=10**4):
+    """
+    Run all benchmarks
+
+    Parameters
+    ----------
+    quick      : smaller problem sizes and fewer repeats, for a fast check
+    max_greedy : largest workforce allocated with the greedy algorithm (which takes O(n) prod calls)
+
+    Returns
+    -------
+    report : dict
+        'environment' (see environment) and 'results', the best seconds per call and problem size of each
+        benchmark by name
+
+    """
+    repeat = 3 if quick else 5
+    m = model.Model()
+    results = {}
+    results.update(bench_prod(m, [10, 1000] if quick else [10, 1000, 100000], repeat))
+    results.update(bench_allocate(m, [10, 1000] if quick else [10, 100, 1000, 10**4, 10**5, 10**6],
+                                  max_greedy, repeat))
+    results.update(bench_simt(m, [10, 100] if quick else [10, 100, 1000], repeat))
+    results.update(bench_bellman([50, 100] if quick else [50, 100, 200, 400], repeat))
+    return {'environment': environment(), 'results': results}
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Benchmarks of current slower than in baseline by more than a fraction threshold
+
+    Parameters
+    ----------
+    baseline, current : reports returned by run
+    threshold         : tolerated slowdown, e.g. 0.2 for 20%
+
+    Returns
+    -------
+    rows : list of tuple
+        (name, baseline seconds, current seconds, ratio, regressed) for each benchmark in both reports
+
+    """
+    rows = []
+    for name, result in current['results'].items():
+        if name in baseline['results']:
+            before, after = baseline['results'][name]['seconds'], result['seconds']
+            rows.append((name, before, after, after / before, after / before > 1 + threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the benchmarks and save the report')
+    run_parser.add_argument('--out', default='bench.json')
+    run_parser.add_argument('--quick', action='store_true')
+    run_parser.add_argument('--max-greedy', type=int, default=10**4)
+    compare_parser = commands.add_parser('compare', help='flag benchmarks slower than in a baseline report')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = run(args.quick, args.max_greedy)
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        for name, result in report['results'].items():
+            print('{:<32} {:>12.3e} s'.format(name, result['seconds']))
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    for name, before, after, ratio, regressed in rows:
+        print('{:<32} {:>12.3e} {:>12.3e} {:>7.2f}x{}'.format(name, before, after, ratio,
+                                                              '  REGRESSION' if regressed else ''))
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+Filename: cache.py
+
+Author: Brian Held
+
+Persistent cache of the results of Model and CareerWorkerProblem methods, stored as .npy files keyed by a hash
+of the parameters, method, arguments, seed and source code, so reruns of an analysis only compute new points
+
+"""
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Modules besides the one defining the class whose code the results of the class depend on
+DEPENDS = {'Model': ('kernels', 'valuation')}
+
+# Code version of each set of source files, by paths
+_versions = {}
+
+# Methods that draw random numbers, only cached when called with a seed
+RANDOM_METHODS = ('simt', 'simt_ensemble')
+
+
+def code_version(obj):
+    """
+    Hash of the source file defining the class of obj and of the modules in DEPENDS for the class, so results
+    are recomputed after the code changes
+    """
+    paths = (inspect.getsourcefile(type(obj)),) + tuple(
+        importlib.util.find_spec(name).origin for name in DEPENDS.get(type(obj).__name__, ()))
+    if paths not in _versions:
+        digest = hashlib.sha256()
+        for path in paths:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        _versions[paths] = digest.hexdigest()
+    return _versions[paths]
+
+
+def _plain(value):
+    # JSON-serializable form of arguments and non-array outputs
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return value
+
+
+def result_key(obj, method, args=(), kwargs=None, seed=None):
+    """
+    Hash identifying the result of obj.method(*args, **kwargs) run with seed
+
+    obj must have a params method returning its constructor arguments (Model, CareerWorkerProblem). The backend
+    attribute of obj (Model) is part of the key.
+    """
+    content = {'class': type(obj).__name__, 'params': {k: float(v) for k, v in obj.params().items()},
+               'backend': getattr(obj, 'backend', None), 'method': method, 'args': _plain(args),
+               'kwargs': _plain(kwargs or {}), 'seed': _plain(seed), 'code': code_version(obj)}
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache(object):
+    """
+    Directory of cached method results with a size cap and least recently used eviction
+
+    Parameters
+    ----------
+    path      : directory of the cache, created if needed
+    max_bytes : total size of the cached results kept; least recently used results are removed beyond it
+
+    Notes
+    -----
+    Each result is a directory named by its key (see result_key) holding one .npy file per array output and
+    meta.json, which holds the other outputs and is written last. Entries are written to a temporary directory
+    and renamed into place, so several processes (e.g. the workers of a sweep) can share one cache. The
+    modification time of meta.json records the last use of an entry.
+
+    """
+
+    def __init__(self, path, max_bytes=2**30):
+        self.path, self.max_bytes = path, max_bytes
+        os.makedirs(path, exist_ok=True)
+        # running estimate of the total size, so the directory is only scanned when the cap may be exceeded
+        self._size = None
+
+    def call(self, obj, name, /, *args, seed=None, mmap=False, **kwargs):
+        """
+        Cached result of obj.name(*args, **kwargs)
+
+        Parameters
+        ----------
+        obj    : Model or CareerWorkerProblem instance
+        name   : name of the method
+        seed   : passed as the seed argument if the method has one, otherwise np.random is seeded with it before
+                 the call (e.g. simt)
+        mmap   : load cached arrays as read-only memory maps
+
+        Methods in RANDOM_METHODS called without a seed are run without the cache, as their result is a new
+        random draw every time.
+
+        """
+        if seed is None and name in RANDOM_METHODS:
+            return getattr(obj, name)(*args, **kwargs)
+        key = result_key(obj, name, args, kwargs, seed)
+        result = self.get(key, mmap)
+        if result is None:
+            fn = getattr(obj, name)
+            if seed is not None and 'seed' in inspect.signature(fn).parameters:
+                kwargs['seed'] = seed
+            elif seed is not None:
+                np.random.seed(seed)
+            result = fn(*args, **kwargs)
+            self.put(key, result)
+        return result
+
+    def get(self, key, mmap=False):
+        """
+        Result stored under key, or None
+        """
+        entry = os.path.join(self.path, key)
+        try:
+            with open(os.path.join(entry, 'meta.json')) as f:
+                meta = json.load(f)
+            os.utime(os.path.join(entry, 'meta.json'))
+        except (OSError, ValueError):
+            return None
+        outputs = []
+        for i, value in enumerate(meta['outputs']):
+            if value is None:
+                try:
+                    array = np.load(os.path.join(entry, '{}.npy'.format(i)), mmap_mode='r' if mmap else None)
+                except (OSError, ValueError):
+                    # evicted by another process since meta.json was read
+                    return None
+                value = array[()] if array.ndim == 0 else array
+            outputs.append(value)
+        return tuple(outputs) if meta['tuple'] else outputs[0]
+
+    def put(self, key, result):
+        """
+        Store a result (an array, scalar or tuple of them; dicts are stored as JSON) under key
+        """
+        outputs = result if isinstance(result, tuple) else (result,)
+        tmp = tempfile.mkdtemp(dir=self.path, prefix='.tmp')
+        meta = {'tuple': isinstance(result, tuple), 'outputs': []}
+        size = 0
+        for i, value in enumerate(outputs):
+            if isinstance(value, dict):
+                meta['outputs'].append(_plain(value))
+            else:
+                np.save(os.path.join(tmp, '{}.npy'.format(i)), np.asarray(value))
+                meta['outputs'].append(None)
+                size += os.path.getsize(os.path.join(tmp, '{}.npy'.format(i)))
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        try:
+            os.rename(tmp, os.path.join(self.path, key))
+        except OSError:
+            # stored by another process in the meantime
+            shutil.rmtree(tmp, ignore_errors=True)
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def entries(self):
+        """
+        (last use, bytes, key) of each stored result, least recently used first
+        """
+        entries = []
+        for key in os.listdir(self.path):
+            entry = os.path.join(self.path, key)
+            try:
+                used = os.path.getmtime(os.path.join(entry, 'meta.json'))
+                size = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+            except OSError:
+                continue
+            entries.append((used, size, key))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """
+        Remove least recently used results until the cache is within max_bytes
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(os.path.join(self.path, key), ignore_errors=True)
+            total -= size
+        self._size = total
+
+    def clear(self):
+        for _, _, key in self.entries():
+            shutil.rmtree(os.path.join(self.path, key), ignore_errors=True)
+        self._size = 0
@@ -0,0 +1,214 @@
+"""
+Filename: cli.py
+
+Author: Brian Held
+
+Command line runner for single analyses of the learning model and of the career model, importing only the
+modules the chosen analysis needs
+
+Usage
+-----
+python cli.py prod 30 30 0 0 10 20 0 0 0 0
+python cli.py allocate 100 50 20 10 60 --method search --out alloc.csv
+python cli.py simulate 100 0 0 0 0 --time 50 --seed 1 --out path.npz
+python cli.py sweep --grid '{"beta": [0.4, 0.5, 0.6]}' --analysis steady_state 100 0 0 0 0 --out sweep.npz
+python cli.py career-solve --N 100 --method mpi --out career.npz
+python cli.py --config run.json allocate 100 50 20 10 60
+
+Output goes to stdout as CSV, or to --out as .csv, .npy (one array of all columns) or .npz (one array per
+column). A config file is a JSON object of option values: the 'model' section applies to every command taking
+model parameters and a section named after a command to that command, e.g.
+
+    {"model": {"beta": 0.5, "learn": 0.2}, "simulate": {"time": 100, "seed": 3}}
+
+Options given on the command line override the config file.
+
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+
+# Model parameters taken by the commands prod, allocate and simulate, in the order of the Model constructor
+MODEL_PARAMS = ('gamma_l', 'gamma_m', 'gamma_h', 'a', 'beta', 'r', 'learn')
+
+TYPES = ('new', 'low', 'high', 'neg', 'pos')
+ALLOC_NAMES = tuple('n{}{}'.format(role, t) for role in (1, 2) for t in TYPES)
+
+
+def _model(args):
+    import model
+
+    return model.Model(**{name: getattr(args, name) for name in MODEL_PARAMS if getattr(args, name) is not None})
+
+
+def _rows(args, width):
+    # rows of the input file if given, otherwise the values on the command line as one row
+    if args.file:
+        return np.atleast_2d(np.loadtxt(args.file, delimiter=',') if args.file.endswith('.csv')
+                             else np.load(args.file)).astype(np.int64)
+    if len(args.values) != width:
+        raise SystemExit('expected {} values or --file, got {}'.format(width, len(args.values)))
+    return np.array([args.values], dtype=np.int64)
+
+
+def run_prod(args):
+    alloc = _rows(args, 10)
+    m = _model(args)
+    return dict(zip(ALLOC_NAMES, alloc.T), prod=m.prod_batch(alloc))
+
+
+def run_allocate(args):
+    states = _rows(args, 5)
+    m = _model(args)
+    if args.method == 'greedy':
+        alloc, prod = m.allocate_many(states)
+    else:
+        results = [m.allocate(*s, method=args.method) for s in states]
+        alloc, prod = np.array([r[0] for r in results]), np.array([r[1] for r in results])
+    return dict(zip(TYPES, states.T), **dict(zip(ALLOC_NAMES, alloc.T)), prod=prod)
+
+
+def run_simulate(args):
+    state = _rows(args, 5)[0]
+    m = _model(args)
+    if args.seed is not None:
+        np.random.seed(args.seed)
+    wkrs, alloc, prod = m.simt(*state, time=args.time, max_periods=args.max_periods)
+    return dict(t=np.arange(len(prod)), **dict(zip(TYPES, wkrs.T)), **dict(zip(ALLOC_NAMES, alloc.T)), prod=prod)
+
+
+def run_sweep(args):
+    import sweep
+
+    if args.out is None or not args.out.endswith('.npz'):
+        raise SystemExit('sweep writes its results with --out FILE.npz')
+    grid = json.loads(args.grid) if isinstance(args.grid, str) else args.grid
+    sweep.sweep(grid, args.analysis, _rows(args, 5)[0], args.out, time=args.time, seed=args.seed,
+                workers=args.workers, chunk_size=args.chunk_size, progress=not args.quiet, cache=args.cache,
+                method=args.method)
+    return None
+
+
+def run_career_solve(args):
+    from test import CareerWorkerProblem
+
+    cp = CareerWorkerProblem(B=args.B, beta=args.beta, N=args.N, F_a=args.F_a, F_b=args.F_b, G_a=args.G_a,
+                             G_b=args.G_b)
+    v, policy, info = cp.solve(tol=args.tol, max_iter=args.max_iter, method=args.method)
+    print(json.dumps(info), file=sys.stderr)
+    return {'v': v, 'policy': policy}
+
+
+def write(columns, out=None):
+    """
+    Write columns (a dict of arrays with one row per result, 1 or 2 dimensional) to out by its extension, or to
+    stdout as CSV if out is None
+    """
+    if out is not None and out.endswith('.npz'):
+        np.savez(out, **columns)
+        return
+    names, data = [], []
+    for name, column in columns.items():
+        column = np.asarray(column)
+        if column.ndim == 1:
+            names.append(name)
+            data.append(column[:, None])
+        else:
+            names.extend('{}_{}'.format(name, j) for j in range(column.shape[1]))
+            data.append(column)
+    data = np.hstack(data)
+    if out is not None and out.endswith('.npy'):
+        np.save(out, data)
+        return
+    integer = np.all(data == np.round(data))
+    np.savetxt(out if out is not None else sys.stdout, data, fmt='%d' if integer else '%.17g', delimiter=',',
+               header=','.join(names), comments='')
+
+
+def parser(config=None):
+    """
+    Argument parser of the command line runner, with the option values of a config dict (see module
+    docstring) as defaults
+    """
+    config = config or {}
+
+    def defaults(name, model_params):
+        values = dict(config.get('model', {}), **config.get(name, {})) if model_params else config.get(name, {})
+        return {key.replace('-', '_'): value for key, value in values.items()}
+
+    parser = argparse.ArgumentParser(description='Run one analysis of the learning or career model.')
+    parser.add_argument('--config', help='JSON file of option values (see module docstring)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    model_args = argparse.ArgumentParser(add_help=False)
+    group = model_args.add_argument_group('model parameters (Model defaults if not given)')
+    for name in MODEL_PARAMS:
+        group.add_argument('--' + name.replace('_', '-'), dest=name, type=float)
+
+    values_args = argparse.ArgumentParser(add_help=False)
+    values_args.add_argument('values', nargs='*', type=int)
+    values_args.add_argument('--file', help='.npy or .csv file of input rows instead of the values')
+
+    out_args = argparse.ArgumentParser(add_help=False)
+    out_args.add_argument('--out', help='output file (.csv, .npy or .npz), CSV on stdout if not given')
+
+    cmd = commands.add_parser('prod', parents=[model_args, values_args, out_args],
+                              help='output of allocations (10 values: role 1 then role 2 workers by type)')
+    cmd.set_defaults(run=run_prod, **defaults('prod', True))
+
+    cmd = commands.add_parser('allocate', parents=[model_args, values_args, out_args],
+                              help='optimal allocation of worker states (5 values: new low high neg pos)')
+    cmd.add_argument('--method', choices=('greedy', 'search'), default='greedy')
+    cmd.set_defaults(run=run_allocate, **defaults('allocate', True))
+
+    cmd = commands.add_parser('simulate', parents=[model_args, values_args, out_args],
+                              help='simulate a firm from a worker state (5 values) with simt')
+    cmd.add_argument('--time', type=int, default=0, help='periods to simulate (until convergence if 0)')
+    cmd.add_argument('--seed', type=int)
+    cmd.add_argument('--max-periods', type=int, default=10000)
+    cmd.set_defaults(run=run_simulate, **defaults('simulate', True))
+
+    cmd = commands.add_parser('sweep', parents=[values_args, out_args],
+                              help='run an analysis over a parameter grid from a worker state (5 values)')
+    cmd.add_argument('--grid', default='{}', help='JSON object of values for each swept parameter')
+    cmd.add_argument('--analysis', choices=('allocate', 'simt', 'steady_state'), default='steady_state')
+    cmd.add_argument('--method', choices=('greedy', 'search'), default='greedy',
+                     help='allocation method of --analysis allocate')
+    cmd.add_argument('--time', type=int, default=0)
+    cmd.add_argument('--seed', type=int)
+    cmd.add_argument('--workers', type=int)
+    cmd.add_argument('--chunk-size', type=int, default=50)
+    cmd.add_argument('--cache', help='result cache directory')
+    cmd.add_argument('--quiet', action='store_true')
+    cmd.set_defaults(run=run_sweep, **defaults('sweep', False))
+
+    cmd = commands.add_parser('career-solve', parents=[out_args], help='solve the career model of Neal')
+    for name, default in (('B', 5.0), ('beta', 0.95), ('N', 50), ('F_a', 1), ('F_b', 1), ('G_a', 1),
+                          ('G_b', 1)):
+        cmd.add_argument('--' + name, type=type(default), default=default)
+    cmd.add_argument('--method', choices=('vfi', 'mpi'), default='vfi')
+    cmd.add_argument('--tol', type=float, default=1e-4)
+    cmd.add_argument('--max-iter', type=int, default=1000)
+    cmd.set_defaults(run=run_career_solve, **defaults('career-solve', False))
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument('--config')
+    config = pre.parse_known_args(argv)[0].config
+    if config:
+        with open(config) as f:
+            config = json.load(f)
+    args = parser(config).parse_args(argv)
+    columns = args.run(args)
+    if columns is not None:
+        write(columns, args.out)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""
+Filename: conftest.py
+
+Author: Brian Held
+
+Fixtures shared by the tests (python -m pytest)
+
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+import model
+
+
+@pytest.fixture(scope='session')
+def m():
+    return model.Model()
+
+
+@pytest.fixture(scope='session')
+def small_states():
+    # every worker state with at most 6 workers of each type
+    return np.array(list(itertools.product(range(7), repeat=5)), dtype=np.int64)
+
+
+@pytest.fixture(scope='session')
+def greedy_small(m, small_states):
+    return np.array([m.allocate(*s)[0] for s in small_states])
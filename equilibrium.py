@@ -0,0 +1,135 @@
+"""
+Filename: equilibrium.py
+
+Author: Brian Held
+
+Split of a pool of workers between firms that maximizes total output, used to show whether one or multiple
+firms exist in the learning model of Ch. 2 of my thesis
+
+"""
+import numpy as np
+
+
+def firm_prod(model, states, method='search'):
+    """
+    Output of firms that each allocate their own workers optimally
+
+    Parameters
+    ----------
+    model  : Model instance
+    states : array_like(int, K x 5)
+        Workers of each type (new, low, high, neg, pos) at each of K firms
+    method : allocation method, 'search' to call model.allocate(..., method='search') for each firm, or
+             'greedy' to allocate all firms in one call of model.allocate_many. Search takes O(log n) prod
+             evaluations per firm and greedy O(n), so search is faster except for many small firms.
+
+    Returns
+    -------
+    prod : array_like(float, length K)
+        Output of each firm, 0 for firms without workers in one of the roles
+
+    Notes
+    -----
+    allocate seeds an empty role with one worker even when the firm has none of that type. Those workers are
+    dropped before production is evaluated (with prod_batch, so a role left empty gives 0).
+
+    """
+    states = np.asarray(states, dtype=np.int64).reshape(-1, 5)
+    if method == 'greedy':
+        alloc = model.allocate_many(states)[0]
+    else:
+        alloc = np.array([model.allocate(*s, method=method)[0] for s in states]).reshape(-1, 10)
+    return model.prod_batch(clip_alloc(alloc, states))
+
+
+def clip_alloc(alloc, states):
+    """
+    Allocations (K x 10) with the workers allocate seeds into empty roles but the firms (states, K x 5) lack
+    dropped, so every allocated worker exists
+    """
+    role1 = np.minimum(alloc[:, 0:5], states)
+    role2 = np.minimum(alloc[:, 5:10], states - role1)
+    return np.hstack([role1, role2])
+
+
+def solve_split(model, wkrs, n_firms=2, starts=4, seed=0, method='search'):
+    """
+    Split of workers between firms that maximizes total output by coordinate ascent
+
+    Parameters
+    ----------
+    model   : Model instance
+    wkrs    : total workers of each type (new, low, high, neg, pos)
+    n_firms : number of firms
+    starts  : number of starting splits: all workers in one firm, an even split and starts - 2 random splits
+    seed    : seed of the random starting splits
+    method  : allocation method of the firms (see firm_prod)
+
+    Returns
+    -------
+    split : array_like(int, n_firms x 5)
+        Workers of each type at each firm in the best split found
+    prod : array_like(float, length n_firms)
+        Output of each firm at that split
+    single : scalar(float)
+        Output of a single firm employing all workers
+    multiple : bool
+        True if the best split produces more than a single firm
+
+    Notes
+    -----
+    From each start, every move of step workers of one type from one firm to another is evaluated and the best
+    improving move is taken. The firm states of a round not seen before go to one firm_prod call, which
+    allocates them one at a time with method='search' (then evaluates their output in one batch) or all
+    together with method='greedy'. When no move improves output the step is halved, down to moves of single
+    workers. Firm outputs are cached by worker state, so each state is allocated once. The result is a local
+    optimum of the split; several starts guard against stopping at the single-firm corner.
+
+    """
+    wkrs = np.asarray(wkrs, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    cache = {}
+
+    def values(states):
+        # output of each firm state, allocating only the states not seen before
+        keys = [tuple(s) for s in states]
+        new = [k for k in dict.fromkeys(keys) if k not in cache]
+        if new:
+            cache.update(zip(new, firm_prod(model, new, method)))
+        return np.array([cache[k] for k in keys])
+
+    single = np.zeros((n_firms, 5), dtype=np.int64)
+    single[0] = wkrs
+    start_splits = [single, wkrs // n_firms + (np.arange(n_firms)[:, None] < wkrs % n_firms)]
+    for _ in range(starts - 2):
+        cuts = np.sort(rng.integers(0, wkrs + 1, size=(n_firms - 1, 5)), axis=0)
+        start_splits.append(np.diff(np.vstack([np.zeros(5, dtype=np.int64), cuts, wkrs]), axis=0))
+
+    # all moves (from firm, to firm, worker type)
+    moves = np.array([(i, k, j) for i in range(n_firms) for k in range(n_firms) if i != k for j in range(5)])
+    best_split, best_prod = None, -np.inf
+    for split in start_splits[:max(starts, 1)]:
+        prod = values(split)
+        step = max(int(wkrs.max()) // 2, 1)
+        while True:
+            feasible = moves[split[moves[:, 0], moves[:, 2]] >= step]
+            src = split[feasible[:, 0]].copy()
+            dst = split[feasible[:, 1]].copy()
+            src[np.arange(len(feasible)), feasible[:, 2]] -= step
+            dst[np.arange(len(feasible)), feasible[:, 2]] += step
+            gain = (values(src) + values(dst)) - (prod[feasible[:, 0]] + prod[feasible[:, 1]])
+            if len(feasible) and np.max(gain) > 1e-9 * max(np.sum(prod), 1):
+                i, k, j = feasible[np.argmax(gain)]
+                split = split.copy()
+                split[i, j] -= step
+                split[k, j] += step
+                prod = values(split)
+            elif step > 1:
+                step //= 2
+            else:
+                break
+        if np.sum(prod) > np.sum(best_prod):
+            best_split, best_prod = split, prod
+
+    single_prod = values(single)[0]
+    return best_split, best_prod, single_prod, bool(np.sum(best_prod) > single_prod * (1 + 1e-9))
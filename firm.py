@@ -1,11 +1,121 @@
 # this program defines the firm class according to Ch. 2
 
+import numpy as np
+
+# Allocation of a firm in Model order: role 1 (low job) then role 2 (high job), each new, low, high, neg, pos
+NAMES = ('n1new', 'n1low', 'n1high', 'n1neg', 'n1pos', 'n2new', 'n2low', 'n2high', 'n2neg', 'n2pos')
+
+
+def _describe(firm):
+    return ('N1 is allocated as: {} {} {} {} {}\nN2 is allocated as: {} {} {} {} {}'
+            .format(*(getattr(firm, name) for name in NAMES)))
+
+
 class Firm(object):
+    __slots__ = NAMES
+
     def __init__(self, n1, n2):
-        self.n1low, self.n1high, self.n1neg, self.n1pos, self.n1new = n1
-        self.n2low, self.n2high, self.n2neg, self.n2pos, self.n2new = n2
+        self.n1new, self.n1low, self.n1high, self.n1neg, self.n1pos = n1
+        self.n2new, self.n2low, self.n2high, self.n2neg, self.n2pos = n2
 
     def __str__(self):
-        return print('N1 is allocated as:', self.n1new, self.n1low, self.n1high, self.n1neg, self.n1pos,
-                     '\nN2 is allocated as:', self.n2new, self.n2low, self.n2high, self.n2neg, self.n2pos, sep=' ')
+        return _describe(self)
+
+
+class FirmPopulation(object):
+    """
+    Allocations of K firms held in one contiguous K x 10 integer array in Model order (see NAMES)
+
+    Parameters
+    ----------
+    alloc : array_like(int, K x 10)
+        Allocation of each firm, as returned by Model.allocate_many
+
+    Attributes
+    ----------
+    alloc : array_like(int32, K x 10)
+    n1, n2 : array_like(int32, K x 5)
+        Views of the role 1 and role 2 columns of alloc
+
+    Notes
+    -----
+    A firm takes 40 bytes, so 10^6 firms take 40 MB. Indexing returns a FirmView of one row, which keeps no
+    copy of the allocation.
+
+    """
+
+    def __init__(self, alloc):
+        self.alloc = np.ascontiguousarray(np.asarray(alloc).reshape(-1, 10), dtype=np.int32)
+
+    @classmethod
+    def zeros(cls, n_firms):
+        return cls(np.zeros((n_firms, 10), dtype=np.int32))
+
+    @classmethod
+    def from_states(cls, model, states):
+        """
+        Firms allocating the workers of each row of states (K x 5) optimally with model.allocate_many
+        """
+        return cls(model.allocate_many(states)[0])
+
+    @property
+    def n1(self):
+        return self.alloc[:, 0:5]
+
+    @property
+    def n2(self):
+        return self.alloc[:, 5:10]
+
+    def __len__(self):
+        return self.alloc.shape[0]
+
+    def __getitem__(self, k):
+        if not -len(self) <= k < len(self):
+            raise IndexError('firm index {} out of range for {} firms'.format(k, len(self)))
+        return FirmView(self, k % len(self))
+
+    def __iter__(self):
+        return (FirmView(self, k) for k in range(len(self)))
+
+    def prod(self, model):
+        """
+        Output of every firm under model (Model.prod_batch)
+        """
+        return model.prod_batch(self.alloc)
+
+
+class FirmView(object):
+    """
+    Handle on firm k of a FirmPopulation, with the attributes of Firm read from and written to its row
+    """
+    __slots__ = ('population', 'index')
+
+    def __init__(self, population, index):
+        self.population, self.index = population, index
+
+    @property
+    def alloc(self):
+        return self.population.alloc[self.index]
+
+    @property
+    def n1(self):
+        return self.alloc[0:5]
+
+    @property
+    def n2(self):
+        return self.alloc[5:10]
+
+    def prod(self, model):
+        return model.prod(*self.alloc)
+
+    def __str__(self):
+        return _describe(self)
+
+
+def _column(i):
+    return property(lambda self: int(self.population.alloc[self.index, i]),
+                    lambda self, value: self.population.alloc.__setitem__((self.index, i), value))
+
 
+for _i, _name in enumerate(NAMES):
+    setattr(FirmView, _name, _column(_i))
@@ -0,0 +1,128 @@
+"""
+Filename: kernels.py
+
+Author: Brian Held
+
+Compiled kernels of the production function, the greedy allocation and the simt transition step of Model, used
+by Model(backend='numba'). Without Numba the functions still run, as plain (slow) Python over the same arrays
+
+"""
+import numpy as np
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+
+@njit(cache=True, error_model='numpy')
+def prod(a, beta, p1, p2, v1_inpt, v2_inpt, alloc):
+    """
+    Model.prod of one allocation (float array of length 10), with the same operations in the same order
+    """
+    n1 = alloc[0:5]
+    n2 = alloc[5:10]
+    e_n1 = np.dot(p1, n1)
+    e_n2 = np.dot(p2, n2)
+    v_n1 = np.dot(v1_inpt, n1)
+    v_n2 = np.dot(v2_inpt, n2)
+    adj_1 = 1 - beta * (1-beta) * v_n1 / (2 * e_n1 ** 2)
+    adj_2 = 1 - beta * (1-beta) * v_n2 / (2 * e_n2 ** 2)
+    return a * e_n1 ** beta * e_n2 ** (1-beta) * adj_1 * adj_2
+
+
+@njit(cache=True, error_model='numpy')
+def _better_low(a, beta, p1, p2, v1_inpt, v2_inpt, alloc, i_low, i_high):
+    # greedy choice of allocate: True if adding a worker at i_low produces at least as much as at i_high
+    low = alloc.copy()
+    low[i_low] += 1
+    high = alloc.copy()
+    high[i_high] += 1
+    return prod(a, beta, p1, p2, v1_inpt, v2_inpt, low) >= prod(a, beta, p1, p2, v1_inpt, v2_inpt, high)
+
+
+@njit(cache=True, error_model='numpy')
+def allocate(a, beta, p1, p2, v1_inpt, v2_inpt, n_new, n_low, n_high, n_neg, n_pos):
+    """
+    Greedy algorithm of Model.allocate
+
+    Returns
+    -------
+    alloc : array_like(int, length 10)
+    prod : scalar(float)
+    steps : array_like(int, length 4)
+        Iterations of steps 3, 4a, 4b and 5 (see ModelStats)
+    prod_calls : number of prod evaluations
+
+    """
+    alloc = np.zeros(10)
+    steps = np.zeros(4, dtype=np.int64)
+    # Algorithm step 1&2
+    alloc[1], alloc[3], alloc[7] = n_low, n_neg, n_high
+    # Algorithm step 3
+    if n_low + n_neg == 0:
+        if n_new > 0:
+            alloc[0] += 1
+        else:
+            alloc[4] += 1
+    if n_high == 0:
+        if n_pos > 0:
+            alloc[9] += 1
+        else:
+            alloc[5] += 1
+    while alloc[0] + alloc[5] < n_new and alloc[4] + alloc[9] < n_pos:
+        alloc[0 if _better_low(a, beta, p1, p2, v1_inpt, v2_inpt, alloc, 0, 9) else 9] += 1
+        steps[0] += 1
+    # Algorithm step 4a - excess new type
+    while alloc[0] + alloc[5] < n_new:
+        alloc[0 if _better_low(a, beta, p1, p2, v1_inpt, v2_inpt, alloc, 0, 5) else 5] += 1
+        steps[1] += 1
+    # Algorithm step 4b - excess pos type
+    while alloc[4] + alloc[9] < n_pos:
+        alloc[4 if _better_low(a, beta, p1, p2, v1_inpt, v2_inpt, alloc, 4, 9) else 9] += 1
+        steps[2] += 1
+    # Algorithm step 5 - check high type allocation
+    low = alloc.copy()
+    low[2] = 1
+    low[7] -= 1
+    while prod(a, beta, p1, p2, v1_inpt, v2_inpt, low) > prod(a, beta, p1, p2, v1_inpt, v2_inpt, alloc):
+        alloc[:] = low
+        low[2] += 1
+        low[7] -= 1
+        steps[3] += 1
+    prod_calls = 2 * (steps[0] + steps[1] + steps[2] + steps[3]) + 3
+    return alloc.astype(np.int64), prod(a, beta, p1, p2, v1_inpt, v2_inpt, alloc), steps, prod_calls
+
+
+@njit(cache=True, error_model='numpy')
+def transition(wkrs, learned, win1, win2, wintrans1, losetrans1, wintrans2, losetrans2):
+    """
+    Workers of each type after the signals of a simt period, and the number of workers released
+
+    Parameters
+    ----------
+    wkrs : array_like(int, length 5)
+        Workers at the start of the period
+    learned : array_like(int, length 10)
+        Workers of each role and type receiving a signal
+    win1, win2 : array_like(int, length 5)
+        Positive signals in roles 1 and 2
+    wintrans1, losetrans1, wintrans2, losetrans2 : transition matrices of model.py
+
+    """
+    new = wkrs.copy()
+    released = 0
+    for i in range(5):
+        lose1 = learned[i] - win1[i]
+        lose2 = learned[5+i] - win2[i]
+        for j in range(5):
+            new[j] += (win1[i] * wintrans1[i, j] + lose1 * losetrans1[i, j] + win2[i] * wintrans2[i, j]
+                       + lose2 * losetrans2[i, j])
+            released -= lose1 * losetrans1[i, j]
+    return new, released
@@ -0,0 +1,159 @@
+"""
+Filename: market.py
+
+Author: Brian Held
+
+Labor market of many firms of the learning model in Ch. 2 of my thesis that release workers into and hire from
+one shared pool of workers. Firms are split into shards advanced in parallel by worker processes, which read and
+write the firm states in shared memory
+
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import model
+from equilibrium import clip_alloc
+
+# Shared arrays of the firm states, names and columns (dtype int64 except prod)
+SHARED = (('wkrs', 5), ('alloc', 10), ('prod', 1), ('flows', 2))
+
+# Arrays of the shards attached by _attach in each process
+_shared = {}
+
+
+def _attach(names, n_firms, params):
+    # process initializer: map the shared arrays and build the model
+    for (name, cols), shm_name in zip(SHARED, names):
+        shm = shared_memory.SharedMemory(name=shm_name)
+        dtype = np.float64 if name == 'prod' else np.int64
+        _shared[name] = np.ndarray((n_firms, cols), dtype=dtype, buffer=shm.buf)
+        _shared[name + '_shm'] = shm
+    _shared['model'] = model.Model(**params)
+
+
+def _advance(first, last, entropy, shard, t, advance):
+    # allocate the firms [first, last) of a shard and, if advance, draw their signals and deaths for period t
+    m = _shared['model']
+    wkrs = _shared['wkrs'][first:last]
+    alloc = clip_alloc(m.allocate_many(wkrs)[0], wkrs)
+    _shared['alloc'][first:last] = alloc
+    _shared['prod'][first:last, 0] = m.prod_batch(alloc)
+    if not advance:
+        return
+    rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(shard, t)))
+    learned = rng.binomial(alloc, m.learn)
+    win1 = rng.binomial(learned[:, 0:5], m.p1)
+    lose1 = (learned[:, 0:5]-win1) @ model.LOSETRANS1
+    chg1 = win1 @ model.WINTRANS1 + lose1
+    win2 = rng.binomial(learned[:, 5:10], m.p2)
+    chg2 = win2 @ model.WINTRANS2 + (learned[:, 5:10]-win2) @ model.LOSETRANS2
+    wkrs += chg1 + chg2
+    dead = rng.binomial(wkrs, model.DEATH)
+    wkrs -= dead
+    _shared['flows'][first:last, 0] = -np.sum(lose1, axis=1)
+    _shared['flows'][first:last, 1] = np.sum(dead, axis=1)
+
+
+def simulate_market(m, states, time, pool=0, unemployed=0, size=None, seed=None, workers=None, shards=None):
+    """
+    Simulate firms sharing one pool of workers over t periods
+
+    Parameters
+    ----------
+    m          : Model instance
+    states     : array_like(int, K x 5)
+        Workers of each type (new, low, high, neg, pos) at each of K firms at t=0
+    time       : number of periods to simulate
+    pool       : new workers waiting to be hired at t=0
+    unemployed : unemployed workers at t=0
+    size       : array_like(int, length K), optional
+        Number of workers each firm hires up to (its number of workers at t=0 if None)
+    seed       : seed of the random draws
+    workers    : number of worker processes (all cores if None, in process if 1)
+    shards     : number of shards the firms are split into (one per worker process if None)
+
+    Returns
+    -------
+    wkrs : array_like(int, t x K x 5)
+        Workers of each type at each firm for each time period
+    alloc : array_like(int, t x K x 10)
+        Optimal assignment of the workers of each firm for each time period
+    prod : array_like(float, t x K)
+        Output of each firm for each time period
+    pool : array_like(int, length t)
+        New workers waiting to be hired for each time period
+    unemployed : array_like(int, length t)
+        Unemployed workers for each time period
+
+    Notes
+    -----
+    Each firm allocates its workers with allocate_many (dropping the workers it seeds into empty roles) and
+    workers learn and die as in simt. Workers found to be of the lowest ability are released to the unemployed,
+    and dead workers and dead unemployed are replaced by new workers entering the pool rather than the firm.
+    Firms below their size then hire new workers from the pool, which is rationed at random when it is short.
+
+    Each period, the shards allocate and advance their firms in parallel in shared memory, and the main process
+    totals the released and dead workers and hands out hires for the whole market in bulk. Draws are made from
+    one stream per shard and period, so results are reproducible for a given seed and number of shards,
+    whatever the number of worker processes.
+
+    """
+    states = np.asarray(states, dtype=np.int64).reshape(-1, 5)
+    n_firms = states.shape[0]
+    size = np.sum(states, axis=1) if size is None else np.asarray(size, dtype=np.int64)
+    workers = workers or os.cpu_count()
+    shards = min(shards or workers, n_firms)
+    bounds = np.linspace(0, n_firms, shards + 1).astype(int)
+    entropy = np.random.SeedSequence(seed).entropy
+    rng = np.random.default_rng(np.random.SeedSequence(entropy))
+
+    hist_wkrs = np.zeros([time+1, n_firms, 5], dtype=np.int32)
+    hist_alloc = np.zeros([time+1, n_firms, 10], dtype=np.int32)
+    hist_prod = np.zeros([time+1, n_firms])
+    hist_pool = np.zeros(time+1, dtype=np.int64)
+    hist_unemployed = np.zeros(time+1, dtype=np.int64)
+
+    shms = [shared_memory.SharedMemory(create=True, size=n_firms * cols * 8) for _, cols in SHARED]
+    pool_exec = None
+    try:
+        init = ([shm.name for shm in shms], n_firms, m.params())
+        if workers == 1:
+            _attach(*init)
+            run = lambda tasks: [_advance(*task) for task in tasks]
+        else:
+            pool_exec = ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=init)
+            run = lambda tasks: list(pool_exec.map(_advance, *zip(*tasks)))
+        shared = {name: np.ndarray((n_firms, cols), dtype=np.float64 if name == 'prod' else np.int64,
+                                   buffer=shm.buf) for (name, cols), shm in zip(SHARED, shms)}
+        shared['wkrs'][:] = states
+
+        for t in range(time + 1):
+            hist_wkrs[t], hist_pool[t], hist_unemployed[t] = shared['wkrs'], pool, unemployed
+            run([(bounds[i], bounds[i+1], entropy, i, t, t < time) for i in range(shards)])
+            hist_alloc[t], hist_prod[t] = shared['alloc'], shared['prod'][:, 0]
+            if t == time:
+                break
+            # exchange workers with the pool
+            released, dead = np.sum(shared['flows'], axis=0)
+            dead_unemployed = rng.binomial(unemployed, model.DEATH)
+            unemployed += released - dead_unemployed
+            pool += dead + dead_unemployed
+            demand = np.maximum(size - np.sum(shared['wkrs'], axis=1), 0)
+            hires = rng.multivariate_hypergeometric(demand, min(pool, int(np.sum(demand))))
+            shared['wkrs'][:, 0] += hires
+            pool -= int(np.sum(hires))
+        del shared
+    finally:
+        if pool_exec is not None:
+            pool_exec.shutdown()
+        if workers == 1:
+            for name, _ in SHARED:
+                _shared.pop(name)
+                _shared.pop(name + '_shm').close()
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+    return hist_wkrs, hist_alloc, hist_prod, hist_pool, hist_unemployed
@@ -6,8 +6,86 @@ Author: Brian Held
 A class to define an instance of the learning model described in Ch. 2 of my thesis
 
 """
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from time import perf_counter
+import warnings
+
 import numpy as np
 
+# Positive signal transition matrix - low job
+WINTRANS1 = np.array([[-1, 0, 0, 0, 1],
+                      [0, 0, 0, 0, 0],
+                      [0, 0, 0, 0, 0],
+                      [0, 1, 0, -1, 0],
+                      [0, 0, 0, 0, 0]])
+# Positive signal transition matrix - high job
+WINTRANS2 = np.array([[-1, 0, 1, 0, 0],
+                      [0, 0, 0, 0, 0],
+                      [0, 0, 0, 0, 0],
+                      [0, 0, 0, 0, 0],
+                      [0, 0, 1, 0, -1]])
+# Negative signal transition matrix - low job
+LOSETRANS1 = np.array([[-1, 0, 0, 0, 0],
+                       [0, 0, 0, 0, 0],
+                       [0, 0, 0, 0, 0],
+                       [0, 0, 0, -1, 0],
+                       [0, 0, 0, 0, 0]])
+# Negative signal transition matrix - high job
+LOSETRANS2 = np.array([[-1, 0, 0, 1, 0],
+                       [0, 0, 0, 0, 0],
+                       [0, 0, 0, 0, 0],
+                       [0, 0, 0, 0, 0],
+                       [0, 1, 0, 0, -1]])
+# Per-period death rate of workers (dead workers are replaced by new type workers)
+DEATH = 0.05
+
+# Statistics of the allocate cache returned by Model.cache_info
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'maxsize', 'currsize'])
+
+
+class ModelStats(object):
+    """
+    Counts and timings of the calls made on a Model while instrumented (see Model.instrument)
+
+    Attributes
+    ----------
+    prod_calls : number of prod evaluations, counting each row of a batched evaluation (prod_batch,
+                 allocate_many) as one
+    allocate_prod : list of int
+        prod evaluations of each allocation computed by allocate (not served by the cache or policy table).
+        Allocations of allocate_many are not listed, as their evaluations are shared across firms.
+    steps : dict
+        Greedy iterations (workers added, or high type workers moved for step 5) of each step of the allocate
+        algorithm, by step '3', '4a', '4b' and '5', summed over the firms of allocate_many
+    periods : list of tuple
+        Wall time in seconds of each simulated period of simt, simt_iter as (allocation, sampling, bookkeeping)
+    growth : float
+        Wall time in seconds spent growing the history buffers of simt
+    resizes : number of times the history buffers of simt were grown
+
+    """
+
+    def __init__(self):
+        self.prod_calls = 0
+        self.allocate_prod = []
+        self.steps = {'3': 0, '4a': 0, '4b': 0, '5': 0}
+        self.periods = []
+        self.growth = 0.0
+        self.resizes = 0
+
+    def summary(self):
+        """
+        Totals of the statistics as a dict
+        """
+        times = np.array(self.periods).reshape(-1, 3)
+        return {'prod_calls': self.prod_calls, 'allocations': len(self.allocate_prod),
+                'prod_per_allocation': float(np.mean(self.allocate_prod)) if self.allocate_prod else 0.0,
+                'steps': {step: int(n) for step, n in self.steps.items()}, 'periods': len(times),
+                'allocation_time': float(np.sum(times[:, 0])), 'sampling_time': float(np.sum(times[:, 1])),
+                'bookkeeping_time': float(np.sum(times[:, 2])), 'growth_time': self.growth,
+                'resizes': self.resizes}
+
 
 class Model(object):
     """
@@ -24,6 +102,13 @@ class Model(object):
     beta    : low type role share of output
     r       : discount rate
     learn   : arrival rate of ability signals
+    cache_size : number of allocate results kept in a least recently used cache keyed by worker state
+                 (no cache if 0)
+    backend : 'numpy', or 'numba' to run prod, the greedy allocate and the simt transition step as compiled
+              kernels (see kernels.py). Falls back to 'numpy' if Numba is not installed.
+
+    Greedy allocations can also be looked up from a precomputed policy table (see use_policy).
+    prod, allocate and simt calls can be counted and timed with instrument.
 
     Attributes
     ----------
@@ -37,6 +122,8 @@ class Model(object):
     v2_inpt : array_like(float, ndim=1)
         P(1-P) for all workers types in the high job type (used for variance calculations in methods)
 
+    The allocate cache is cleared and the policy table detached whenever one of the attributes above is
+    assigned.
 
     Worker Type Indexing
     --------------------
@@ -50,16 +137,105 @@ class Model(object):
     is first (indexed [0:4]) and high is last (indexed [5:9])
     """
 
-    def __init__(self, gamma_l=0.2, gamma_m=0.6, gamma_h=0.2, a=1, beta=0.6, r=0.03, learn=0.1):
+    # attributes that allocate results depend on
+    _cached_on = ('gam_l', 'gam_m', 'gam_h', 'a', 'beta', 'r', 'learn', 'p1', 'p2', 'v1_inpt', 'v2_inpt')
+
+    def __init__(self, gamma_l=0.2, gamma_m=0.6, gamma_h=0.2, a=1, beta=0.6, r=0.03, learn=0.1, cache_size=0,
+                 backend='numpy'):
+        if backend not in ('numpy', 'numba'):
+            raise ValueError("backend must be 'numpy' or 'numba', got {!r}".format(backend))
+        self._kernels = None
+        if backend == 'numba':
+            import kernels
+            if kernels.HAVE_NUMBA:
+                self._kernels = kernels
+        self.backend = 'numpy' if self._kernels is None else 'numba'
+        self._cache = OrderedDict() if cache_size > 0 else None
+        self._cache_size = cache_size
+        self._cache_stats = [0, 0, 0]  # hits, misses, evictions
+        self._policy = None
+        self._stats = None
         self.gam_l, self.gam_m, self.gam_h = gamma_l, gamma_m, gamma_h
         self.a, self.beta, self.r, self.learn = a, beta, r, learn
 
-        self.p1 = np.array([self.gam_m + self.gam_h, 1, 1, self.gam_m / (self.gam_l + self.gam_m), 1])
-        self.p2 = np.array([self.gam_h, 0, 1, 0, self.gam_h / (self.gam_h + self.gam_m)])
+        self.p1, self.p2 = success_probs(self.gam_l, self.gam_m, self.gam_h)
 
         self.v1_inpt = self.p1 * (1 - self.p1)
         self.v2_inpt = self.p2 * (1 - self.p2)
 
+    def __setattr__(self, name, value):
+        if name in self._cached_on and getattr(self, '_cache', None):
+            self._cache.clear()
+        if name in self._cached_on and getattr(self, '_policy', None) is not None:
+            self._policy = None
+        object.__setattr__(self, name, value)
+
+    def params(self):
+        """
+        Parameters of the model as a dict of Model keyword arguments
+        """
+        return {'gamma_l': self.gam_l, 'gamma_m': self.gam_m, 'gamma_h': self.gam_h, 'a': self.a,
+                'beta': self.beta, 'r': self.r, 'learn': self.learn}
+
+    def use_policy(self, table):
+        """
+        Look greedy allocations of worker states within the bounds of a policy table up in the table instead of
+        computing them (see policy.build_policy). Pass None to stop using a table.
+        """
+        if table is not None and not table.matches(self):
+            raise ValueError('policy table was built for different parameters')
+        self._policy = table
+
+    def cache_info(self):
+        """
+        Statistics of the allocate cache as a CacheInfo(hits, misses, evictions, maxsize, currsize)
+        """
+        return CacheInfo(*self._cache_stats, self._cache_size, 0 if self._cache is None else len(self._cache))
+
+    def cache_clear(self):
+        """
+        Empty the allocate cache and reset its statistics
+        """
+        if self._cache is not None:
+            self._cache.clear()
+        self._cache_stats = [0, 0, 0]
+
+    @contextmanager
+    def instrument(self):
+        """
+        Context manager that records a ModelStats of the prod, allocate and simt calls made in its block,
+        including the batched evaluations of prod_batch and allocate_many (e.g. from simt_ensemble)
+
+        Examples
+        --------
+        >>> with m.instrument() as stats:
+        ...     m.simt(100, 0, 0, 0, 0, time=50)
+        >>> stats.summary()
+
+        """
+        stats, previous = ModelStats(), self._stats
+        self._stats = stats
+        try:
+            yield stats
+        finally:
+            self._stats = previous
+
+    def _cache_get(self, key):
+        # cached (alloc, prod) for key, or None
+        result = self._cache.get(key)
+        if result is None:
+            self._cache_stats[1] += 1
+            return None
+        self._cache.move_to_end(key)
+        self._cache_stats[0] += 1
+        return result[0].copy(), result[1]
+
+    def _cache_put(self, key, alloc, prod):
+        self._cache[key] = (np.array(alloc), prod)
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+            self._cache_stats[2] += 1
+
     def prod(self, n1new, n1low, n1high, n1neg, n1pos, n2new, n2low, n2high, n2neg, n2pos):
         """
         Production as a function of labor input by type/assignment
@@ -83,6 +259,9 @@ class Model(object):
             The expected output of the firm given the worker allocation
 
         """
+        if self._kernels is not None:
+            return self._prod_kernel(np.array([n1new, n1low, n1high, n1neg, n1pos,
+                                               n2new, n2low, n2high, n2neg, n2pos], dtype=float))
         n1 = np.array([n1new, n1low, n1high, n1neg, n1pos])
         n2 = np.array([n2new, n2low, n2high, n2neg, n2pos])
 
@@ -100,9 +279,151 @@ class Model(object):
 
         # return expected output
         production = self.a * e_n1 ** self.beta * e_n2 ** (1-self.beta) * adj_1 * adj_2
+        if self._stats is not None:
+            self._stats.prod_calls += 1
         return production
 
-    def allocate(self, n_new, n_low, n_high, n_neg, n_pos):
+    def _prod_kernel(self, alloc):
+        # prod of the numba backend
+        if self._stats is not None:
+            self._stats.prod_calls += 1
+        return self._kernels.prod(float(self.a), float(self.beta), self.p1, self.p2, self.v1_inpt, self.v2_inpt,
+                                  alloc)
+
+    def prod_batch(self, alloc):
+        """
+        Production for a batch of allocations evaluated in a single pass
+
+        Parameters
+        ----------
+        alloc : array_like(int, N x 10)
+            Worker allocations, one per row, in the same order as the arguments of prod (role 1 types in
+            columns [0:5], role 2 types in columns [5:10]). A single allocation of length 10 is also accepted.
+
+        Returns
+        -------
+        production : array_like(float, length N)
+            The expected output of the firm for each allocation
+
+        Notes
+        -----
+        Rows with zero expected input in either role produce 0.0 by definition. This is not a limit of the
+        production function: with uncertain workers in a role the variance adjustment dominates as its input
+        goes to zero and output goes to -inf. The scalar prod method returns nan for these inputs instead.
+
+        Each row is computed with the same sequence of array operations whatever the batch size, so a row
+        evaluates to the same value alone or in a batch. Values agree with prod up to rounding.
+
+        """
+        alloc = np.asarray(alloc, dtype=float)
+        if alloc.ndim == 1:
+            alloc = alloc[np.newaxis, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            production = self._prod_rows(alloc)
+
+        # zero-input contract: no expected input in a role means no output
+        empty = (self._expect(self.p1, alloc[:, 0:5].T) == 0) | (self._expect(self.p2, alloc[:, 5:10].T) == 0)
+        production[empty] = 0
+        return production
+
+    def _prod_rows(self, alloc):
+        """
+        Production for each row of a float N x 10 allocation array without the zero-input handling of
+        prod_batch (rows with zero expected input in a role give nan or inf as in prod)
+        """
+        if self._stats is not None:
+            self._stats.prod_calls += alloc.shape[0]
+        n1 = alloc[:, 0:5].T
+        n2 = alloc[:, 5:10].T
+
+        # expected input for role 1 and 2
+        e_n1 = self._expect(self.p1, n1)
+        e_n2 = self._expect(self.p2, n2)
+
+        # expected input variance for roles 1 and 2
+        v_n1 = self._expect(self.v1_inpt, n1)
+        v_n2 = self._expect(self.v2_inpt, n2)
+
+        # output adjustments for uncertainty in labor input by role
+        adj_1 = 1 - self.beta * (1-self.beta) * v_n1 / (2 * e_n1 ** 2)
+        adj_2 = 1 - self.beta * (1-self.beta) * v_n2 / (2 * e_n2 ** 2)
+
+        return self.a * e_n1 ** self.beta * e_n2 ** (1-self.beta) * adj_1 * adj_2
+
+    @staticmethod
+    def _expect(p, n):
+        """
+        Weighted sum of n over the worker type axis (axis 0), accumulated in a fixed order independent of
+        the batch size
+        """
+        return p[0] * n[0] + p[1] * n[1] + p[2] * n[2] + p[3] * n[3] + p[4] * n[4]
+
+    def marginal_products(self, alloc):
+        """
+        Gradient of expected output with respect to each of the 10 labor inputs, in closed form
+
+        Parameters
+        ----------
+        alloc : array_like(float, N x 10)
+            Worker allocations, one per row, in the order of the arguments of prod. A single allocation of
+            length 10 is also accepted.
+
+        Returns
+        -------
+        mp : array_like(float, N x 10)
+            Partial derivative of prod with respect to each input for each allocation
+
+        Notes
+        -----
+        With E and V the expected input and its variance in a role, output is a * E1^beta * E2^(1-beta) * A1 * A2
+        for adjustments A = 1 - beta * (1-beta) * V / (2 * E^2). A role 1 input with weights p1[j], v1_inpt[j]
+        then has marginal product
+
+            a * E1^beta * E2^(1-beta) * A2 * (beta * p1[j] / E1 * A1 - beta * (1-beta) / 2 * (v1_inpt[j] / E1^2
+            - 2 * V1 * p1[j] / E1^3))
+
+        and role 2 inputs likewise with exponent 1-beta. Rows with zero expected input in a role give nan or inf.
+
+        """
+        return marginal_products(self.a, self.beta, self.p1, self.p2, self.v1_inpt, self.v2_inpt, alloc)
+
+    def marginal_surface(self, alloc, discrete=False, chunk_size=100000, out=None):
+        """
+        Marginal products over a large grid of allocations, evaluated a chunk of rows at a time
+
+        Parameters
+        ----------
+        alloc      : array_like(int, N x 10)
+            Grid of allocations, one per row (may be a memory-mapped array)
+        discrete   : if True, the gain in output from one more worker of each input, prod_batch(x + e_j) -
+                     prod_batch(x), instead of the derivative (marginal_products)
+        chunk_size : number of rows evaluated at a time, bounding the temporary memory used
+        out        : array_like(float, N x 10), optional
+            Array (e.g. a memory-mapped .npy file) the result is written into
+
+        Returns
+        -------
+        mp : array_like(float, N x 10)
+            Marginal product of each input for each allocation (out if given)
+
+        """
+        alloc = np.asarray(alloc).reshape(-1, 10)
+        if out is None:
+            out = np.empty(alloc.shape)
+        for start in range(0, alloc.shape[0], chunk_size):
+            rows = np.asarray(alloc[start:start + chunk_size], dtype=float)
+            if not discrete:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    out[start:start + len(rows)] = self.marginal_products(rows)
+                continue
+            # one batch of all 10 single-worker additions to each row, ordered by input
+            more = np.repeat(rows[np.newaxis], 10, axis=0)
+            more[np.arange(10), :, np.arange(10)] += 1
+            gain = self.prod_batch(more.reshape(-1, 10)).reshape(10, -1) - self.prod_batch(rows)
+            out[start:start + len(rows)] = gain.T
+        return out
+
+    def allocate(self, n_new, n_low, n_high, n_neg, n_pos, method='greedy', check=False):
         """
         Method to optimally allocate a given set of workers within a single firm
 
@@ -113,6 +434,9 @@ class Model(object):
         n_high : total high type workers
         n_neg  : total neg type workers
         n_pos  : total pos type workers
+        method : 'greedy' to add one worker per iteration, 'search' to locate the end of each greedy step by
+                 galloping/bisection search (O(log n) prod evaluations, see _allocate_search)
+        check  : with method='search', also run the greedy algorithm and raise RuntimeError if the two differ
 
         Returns
         -------
@@ -136,6 +460,53 @@ class Model(object):
         proof is tbd
 
         """
+        if self._policy is not None and method == 'greedy':
+            state = (n_new, n_low, n_high, n_neg, n_pos)
+            if self._policy.contains(state)[0]:
+                alloc, prod = self._policy.lookup(state)
+                return alloc[0], prod[0]
+        if self._cache is None:
+            return self._allocate(n_new, n_low, n_high, n_neg, n_pos, method, check)
+        key = (int(n_new), int(n_low), int(n_high), int(n_neg), int(n_pos), method)
+        result = self._cache_get(key)
+        if result is None:
+            result = self._allocate(n_new, n_low, n_high, n_neg, n_pos, method, check)
+            self._cache_put(key, *result)
+        return result
+
+    def _allocate(self, n_new, n_low, n_high, n_neg, n_pos, method, check):
+        # allocate without the cache
+        stats = self._stats
+        if stats is not None:
+            before = stats.prod_calls
+        if method == 'search':
+            result = self._allocate_search(n_new, n_low, n_high, n_neg, n_pos)
+            if check:
+                greedy = self.allocate(n_new, n_low, n_high, n_neg, n_pos)[0]
+                if not np.array_equal(result[0], greedy):
+                    raise RuntimeError('search allocation {} differs from greedy allocation {}'.format(
+                        list(result[0]), list(greedy)))
+        elif method == 'greedy':
+            result = self._allocate_greedy(n_new, n_low, n_high, n_neg, n_pos)
+        else:
+            raise ValueError("method must be 'greedy' or 'search', got {!r}".format(method))
+        if stats is not None:
+            stats.allocate_prod.append(stats.prod_calls - before)
+        return result
+
+    def _allocate_greedy(self, n_new, n_low, n_high, n_neg, n_pos):
+        # greedy algorithm of allocate (see Algorithm there)
+        stats = self._stats
+        if self._kernels is not None:
+            alloc, prod, steps, prod_calls = self._kernels.allocate(
+                float(self.a), float(self.beta), self.p1, self.p2, self.v1_inpt, self.v2_inpt,
+                n_new, n_low, n_high, n_neg, n_pos)
+            if stats is not None:
+                stats.prod_calls += prod_calls
+                for step, n in zip(('3', '4a', '4b', '5'), steps):
+                    stats.steps[step] += n
+            return alloc, prod
+
         # Algorithm step 1&2
         alloc = [0, n_low, 0, n_neg, 0, 0, 0, n_high, 0, 0]
         # Algorithm step 3
@@ -149,6 +520,8 @@ class Model(object):
                 alloc[9] += 1
             else:
                 alloc[5] += 1
+        if stats is not None:
+            seeded = np.copy(alloc)
         while alloc[0] + alloc[5] < n_new and alloc[4] + alloc[9] < n_pos:
             low = np.copy(alloc)
             low[0] += 1
@@ -158,6 +531,9 @@ class Model(object):
                 alloc = np.copy(low)
             else:
                 alloc = np.copy(high)
+        if stats is not None:
+            stats.steps['3'] += alloc[0] + alloc[9] - seeded[0] - seeded[9]
+            seeded = np.copy(alloc)
         # Algorithm step 4a - excess new type
         while alloc[0] + alloc[5] < n_new:
             low = np.copy(alloc)
@@ -178,6 +554,9 @@ class Model(object):
                 alloc = np.copy(low)
             else:
                 alloc = np.copy(high)
+        if stats is not None:
+            stats.steps['4a'] += alloc[0] + alloc[5] - seeded[0] - seeded[5]
+            stats.steps['4b'] += alloc[4] + alloc[9] - seeded[4] - seeded[9]
         # Algorithm step 5 - check high type allocation
         low = np.copy(alloc)
         low[2] = 1
@@ -186,9 +565,194 @@ class Model(object):
             alloc = np.copy(low)
             low[2] += 1
             low[7] -= 1
+        if stats is not None:
+            stats.steps['5'] += alloc[2]
         return alloc, self.prod(*alloc)
 
-    def simt(self, n_new, n_low, n_high, n_neg, n_pos, time=0):
+    def _allocate_search(self, n_new, n_low, n_high, n_neg, n_pos):
+        """
+        Greedy allocation of allocate computed by searching for where each step of the algorithm stops
+
+        Notes
+        -----
+        Each greedy step chooses between adding a worker at index x or at index y of the allocation. Write
+        go_x(x, y) for the greedy choice after x and y workers have been added. As output is concave in each
+        role's input and the roles are complements, go_x is decreasing in x and increasing in y, so the greedy
+        path is a staircase that only depends on where go_x switches. The end of the path is found by galloping
+        search over the staircase, which takes O(log n) prod evaluations instead of O(n). Step 5 is the same
+        search on the number of high type workers moved to the low role, limited to the high type workers
+        available. If go_x is not monotone (e.g. near the variance adjustment for very small firms) the result
+        can differ from allocate; use check=True to compare.
+
+        """
+        # Algorithm step 1&2
+        alloc = np.array([0, n_low, 0, n_neg, 0, 0, 0, n_high, 0, 0], dtype=np.int64)
+        # Algorithm step 3
+        if n_low + n_neg == 0:
+            if n_new > 0:
+                alloc[0] += 1
+            else:
+                alloc[4] += 1
+        if n_high == 0:
+            if n_pos > 0:
+                alloc[9] += 1
+            else:
+                alloc[5] += 1
+
+        def point(i_x, x, i_y, y):
+            pt = alloc.copy()
+            pt[i_x] += x
+            pt[i_y] += y
+            return pt
+
+        def go_x(i_x, i_y, x, y):
+            return self.prod(*point(i_x, x + 1, i_y, y)) >= self.prod(*point(i_x, x, i_y, y + 1))
+
+        new_left = n_new - alloc[0] - alloc[5]
+        pos_left = n_pos - alloc[4] - alloc[9]
+        if new_left > 0 and pos_left > 0:
+            # first level of pos workers at which all remaining new workers go to the low role
+            y = _gallop(lambda y: go_x(0, 9, new_left - 1, y), 0, pos_left)
+            if y < pos_left:
+                alloc = point(0, new_left, 9, y)
+            else:
+                x = _gallop(lambda x: not go_x(0, 9, x, pos_left - 1), 0, new_left)
+                alloc = point(0, x, 9, pos_left)
+        # Algorithm step 4a - excess new type
+        new_left = n_new - alloc[0] - alloc[5]
+        if new_left > 0:
+            y = _gallop(lambda y: y == new_left or go_x(0, 5, new_left - y - 1, y), 0, new_left + 1)
+            alloc = point(0, new_left - y, 5, y)
+        # Algorithm step 4b - excess pos type
+        pos_left = n_pos - alloc[4] - alloc[9]
+        if pos_left > 0:
+            y = _gallop(lambda y: y == pos_left or go_x(4, 9, pos_left - y - 1, y), 0, pos_left + 1)
+            alloc = point(4, pos_left - y, 9, y)
+        # Algorithm step 5 - check high type allocation
+        k = _gallop(lambda k: not self.prod(*point(2, k + 1, 7, -k - 1)) > self.prod(*point(2, k, 7, -k)),
+                    0, alloc[7])
+        alloc = point(2, k, 7, -k)
+        return alloc, self.prod(*alloc)
+
+    def allocate_many(self, states):
+        """
+        Method to optimally allocate the workers of many firms at once
+
+        Parameters
+        ----------
+        states : array_like(int, K x 5)
+            Total workers of each type (new, low, high, neg, pos) for each of K firms
+
+        Returns
+        -------
+        alloc : array_like(int, K x 10)
+            Returns the optimal assignment of workers for each firm
+        prod : array_like(float, length K)
+            Returns the output associated with optimal assignment for each firm
+
+        Notes
+        -----
+        Runs the same greedy algorithm as allocate, one step for all firms still allocating at a time, so each
+        row of the result is the allocation allocate returns for that firm. Comparisons are made with the
+        batched production function, which agrees with prod up to rounding. Shares the cache and policy table
+        of allocate.
+
+        """
+        states = np.asarray(states, dtype=np.int64)
+        if states.ndim == 1:
+            states = states[np.newaxis, :]
+        if self._cache is None and self._policy is None:
+            return self._allocate_many(states)
+
+        alloc = np.zeros((states.shape[0], 10), dtype=np.int64)
+        prod = np.zeros(states.shape[0])
+        missed = np.arange(states.shape[0])
+        if self._policy is not None:
+            found = self._policy.contains(states)
+            alloc[found], prod[found] = self._policy.lookup(states[found])
+            missed = missed[~found]
+        if self._cache is not None:
+            # results of the greedy algorithm are shared with allocate(..., method='greedy')
+            keys = {i: tuple(int(n) for n in states[i]) + ('greedy',) for i in missed}
+            uncached = []
+            for i in missed:
+                result = self._cache_get(keys[i])
+                if result is None:
+                    uncached.append(i)
+                else:
+                    alloc[i], prod[i] = result
+            missed = np.array(uncached, dtype=np.int64)
+        if missed.size > 0:
+            alloc[missed], prod[missed] = self._allocate_many(states[missed])
+        if self._cache is not None:
+            for i in missed:
+                self._cache_put(keys[i], alloc[i], prod[i])
+        return alloc, prod
+
+    def _allocate_many(self, states):
+        # allocate_many without the cache
+        n_new, n_low, n_high, n_neg, n_pos = states.T
+
+        # Algorithm step 1&2
+        alloc = np.zeros((states.shape[0], 10), dtype=np.int64)
+        alloc[:, 1], alloc[:, 3], alloc[:, 7] = n_low, n_neg, n_high
+        # Algorithm step 3
+        empty = n_low + n_neg == 0
+        alloc[empty & (n_new > 0), 0] += 1
+        alloc[empty & (n_new <= 0), 4] += 1
+        empty = n_high == 0
+        alloc[empty & (n_pos > 0), 9] += 1
+        alloc[empty & (n_pos <= 0), 5] += 1
+
+        def new_left(a, rows):
+            return a[:, 0] + a[:, 5] < n_new[rows]
+
+        def pos_left(a, rows):
+            return a[:, 4] + a[:, 9] < n_pos[rows]
+
+        stats = self._stats
+
+        def greedy(step, remaining, i_low, i_high):
+            # add one worker to i_low or i_high for every firm with workers remaining, keeping the higher output
+            rows = np.arange(alloc.shape[0])
+            rows = rows[remaining(alloc, rows)]
+            while rows.size > 0:
+                if stats is not None:
+                    stats.steps[step] += rows.size
+                low = alloc[rows].astype(float)
+                low[:, i_low] += 1
+                high = alloc[rows].astype(float)
+                high[:, i_high] += 1
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    keep_low = self._prod_rows(low) >= self._prod_rows(high)
+                alloc[rows, np.where(keep_low, i_low, i_high)] += 1
+                rows = rows[remaining(alloc[rows], rows)]
+
+        greedy('3', lambda a, rows: new_left(a, rows) & pos_left(a, rows), 0, 9)
+        # Algorithm step 4a - excess new type
+        greedy('4a', new_left, 0, 5)
+        # Algorithm step 4b - excess pos type
+        greedy('4b', pos_left, 4, 9)
+
+        # Algorithm step 5 - check high type allocation
+        low = alloc.astype(float)
+        low[:, 2] = 1
+        low[:, 7] -= 1
+        rows = np.arange(alloc.shape[0])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            better = self._prod_rows(low) > self._prod_rows(alloc.astype(float))
+            while rows[better].size > 0:
+                rows = rows[better]
+                if stats is not None:
+                    stats.steps['5'] += rows.size
+                alloc[rows] = low[rows]
+                low[rows, 2] += 1
+                low[rows, 7] -= 1
+                better = self._prod_rows(low[rows]) > self._prod_rows(alloc[rows].astype(float))
+            prod = self._prod_rows(alloc.astype(float))
+        return alloc, prod
+
+    def simt(self, n_new, n_low, n_high, n_neg, n_pos, time=0, max_periods=10000):
         """
         Method to simulate worker transitions and output over t periods starting with an initial worker state
 
@@ -200,6 +764,8 @@ class Model(object):
         n_high : total high type workers at t=0
         n_neg  : total neg type workers at t=0
         n_pos  : total pos type workers at t=0
+        max_periods : upper bound on the number of periods simulated when running until convergence (t=0). A
+                      RuntimeWarning is emitted if the run stops there without converging.
 
         Returns
         -------
@@ -215,60 +781,371 @@ class Model(object):
         The uncertainty resolves at the aggregate level. There is opportunity to do firm level simulation
         in which realized output updates the firm-level beliefs about individual worker ability.
 
+        History is written into preallocated buffers, sized from time when it is given and doubled as needed
+        when running until convergence, and trimmed to the simulated periods on return.
+
+        """
+        size = time + 1 if time > 0 else 64
+        wkrs = np.zeros([size,5], dtype=np.int32)
+        alloc = np.zeros([size,10], dtype=np.int32)
+        prod = np.zeros([size])
+        unemployed = np.zeros([size], dtype=np.int32)
+        for t, *period in self.simt_iter(n_new, n_low, n_high, n_neg, n_pos, time, max_periods):
+            if t == size:
+                start = perf_counter()
+                size *= 2
+                wkrs, alloc, prod, unemployed = (np.resize(x, (size,) + x.shape[1:])
+                                                 for x in (wkrs, alloc, prod, unemployed))
+                if self._stats is not None:
+                    self._stats.growth += perf_counter() - start
+                    self._stats.resizes += 1
+            wkrs[t], alloc[t], prod[t], unemployed[t] = period
+        return wkrs[:t+1], alloc[:t+1], prod[:t+1]
+
+    def simt_iter(self, n_new, n_low, n_high, n_neg, n_pos, time=0, max_periods=10000):
+        """
+        Generator version of simt that yields each period as it is simulated instead of keeping the history
+
+        Parameters
+        ----------
+        n_new, n_low, n_high, n_neg, n_pos, max_periods : see simt
+        time : number of periods to simulate (until convergence if 0, without end if None)
+
+        Yields
+        ------
+        t : int
+            Period, starting from the initial state at t=0
+        wkrs : array_like(int, length 5)
+            State vector of workers
+        alloc : array_like(int, length 10)
+            Optimal assignment of workers
+        prod : scalar(float)
+            Output associated with optimal assignment
+        unemployed : int
+            Number of unemployed workers
+
+        Notes
+        -----
+        Stops by the same rules as simt and makes the same random draws, so the periods yielded are the rows of
+        simt's output for the same np.random state. Memory use does not grow with the number of periods; see
+        stream.py for reducers and writers that consume the periods.
+
         """
-        # Positive signal transition matrix - low job
-        wintrans1 = np.array([[-1, 0, 0, 0, 1],
-                             [0, 0, 0, 0, 0],
-                             [0, 0, 0, 0, 0],
-                             [0, 1, 0, -1, 0],
-                             [0, 0, 0, 0, 0]])
-        # Positive signal transition matrix - high job
-        wintrans2 = np.array([[-1, 0, 1, 0, 0],
-                             [0, 0, 0, 0, 0],
-                             [0, 0, 0, 0, 0],
-                             [0, 0, 0, 0, 0],
-                             [0, 0, 1, 0, -1]])
-        # Negative signal transition matrix - low job
-        losetrans1 = np.array([[-1, 0, 0, 0, 0],
-                             [0, 0, 0, 0, 0],
-                             [0, 0, 0, 0, 0],
-                             [0, 0, 0, -1, 0],
-                             [0, 0, 0, 0, 0]])
-        # Negative signal transition matrix - high job
-        losetrans2 = np.array([[-1, 0, 0, 1, 0],
-                             [0, 0, 0, 0, 0],
-                             [0, 0, 0, 0, 0],
-                             [0, 0, 0, 0, 0],
-                             [0, 1, 0, 0, -1]])
-        death = 0.05
-        wkrs = np.zeros([2,5], dtype=np.int32)
-        alloc = np.zeros([2,10], dtype=np.int32)
-        prod = np.zeros([2])
-        unemployed = np.zeros([2], dtype=np.int32)
-        wkrs[0] = np.array([n_new, n_low, n_high, n_neg, n_pos])
-        alloc[0], prod[0] = self.allocate(*wkrs[0])
+        wkrs = np.array([n_new, n_low, n_high, n_neg, n_pos], dtype=np.int32)
+        alloc, prod = self.allocate(*wkrs)
+        alloc = np.asarray(alloc, dtype=np.int32)
+        unemployed = 0
         t = 0
-        flag = 0
-        while flag == 0:
+        yield t, wkrs, alloc, prod, unemployed
+        stats = self._stats
+        while True:
             t += 1
-            if t > 1:
-                wkrs = np.append(wkrs, np.zeros((1, 5), dtype=np.int32), axis=0)
-                alloc = np.append(alloc, np.zeros((1, 10), dtype=np.int32), axis=0)
-                prod = np.append(prod, np.zeros(1), axis=0)
-                unemployed = np.append(unemployed, np.zeros(1, dtype=np.int32), axis=0)
+            if stats is not None:
+                clock = [perf_counter()]
             # resolve uncertainty
-            learned = np.random.binomial(alloc[t-1], self.learn, size=10)
+            learned = np.random.binomial(alloc, self.learn, size=10)
             win1 = np.random.binomial(learned[0:5], self.p1, size=5)
-            chg1 = win1 @ wintrans1 + (learned[0:5]-win1) @ losetrans1
             win2 = np.random.binomial(learned[5:10], self.p2, size=5)
-            chg2 = win2 @ wintrans2 + (learned[5:10]-win2) @ losetrans2
-            wkrs[t] = chg1 + chg2 + wkrs[t-1]
-            dead = np.random.binomial(wkrs[t], death, size=5)
-            dead_unemployed = np.random.binomial(unemployed[t-1], death)
-            unemployed[t] = unemployed[t-1] - np.sum((learned[0:5]-win1) @ losetrans1) - dead_unemployed
-            wkrs[t] -= dead
-            wkrs[t, 0] += np.sum(dead) + dead_unemployed
-            alloc[t], prod[t] = self.allocate(*wkrs[t])
-            if t == time or (t > time and sum(np.subtract(wkrs[t], wkrs[t-1])) <= max(5, sum(wkrs[t]) * 0.05)):
-                flag = 1
-        return wkrs, alloc, prod
+            if stats is not None:
+                clock.append(perf_counter())
+            if self._kernels is None:
+                chg1 = win1 @ WINTRANS1 + (learned[0:5]-win1) @ LOSETRANS1
+                chg2 = win2 @ WINTRANS2 + (learned[5:10]-win2) @ LOSETRANS2
+                prev, wkrs = wkrs, (chg1 + chg2 + wkrs).astype(np.int32)
+                released = -np.sum((learned[0:5]-win1) @ LOSETRANS1)
+            else:
+                prev, (wkrs, released) = wkrs, self._kernels.transition(wkrs, learned, win1, win2, WINTRANS1,
+                                                                        LOSETRANS1, WINTRANS2, LOSETRANS2)
+            if stats is not None:
+                clock.append(perf_counter())
+            dead = np.random.binomial(wkrs, DEATH, size=5)
+            dead_unemployed = np.random.binomial(unemployed, DEATH)
+            if stats is not None:
+                clock.append(perf_counter())
+            unemployed = unemployed + released - dead_unemployed
+            wkrs -= dead.astype(np.int32)
+            wkrs[0] += np.sum(dead) + dead_unemployed
+            if stats is not None:
+                clock.append(perf_counter())
+            alloc, prod = self.allocate(*wkrs)
+            alloc = np.asarray(alloc, dtype=np.int32)
+            if stats is not None:
+                c = clock + [perf_counter()]
+                stats.periods.append((c[5] - c[4], c[1] - c[0] + c[3] - c[2], c[2] - c[1] + c[4] - c[3]))
+            yield t, wkrs, alloc, prod, unemployed
+            if time is not None and (t == time or (t > time and converged(prev, wkrs))):
+                return
+            elif time == 0 and t == max_periods:
+                warnings.warn('simt did not converge within max_periods={}'.format(max_periods), RuntimeWarning,
+                              stacklevel=2)
+                return
+
+    def simt_ensemble(self, n_reps, n_new, n_low, n_high, n_neg, n_pos, time=0, seed=None, max_periods=10000):
+        """
+        Method to simulate many independent replications of simt together, one period for all replications at a
+        time
+
+        Parameters
+        ----------
+        n_reps : number of replications
+        n_new, n_low, n_high, n_neg, n_pos, time, max_periods : see simt
+        seed   : seed (or np.random.Generator) for the random draws of all replications
+
+        Returns
+        -------
+        wkrs : array_like(int, n_reps x t x 5)
+            State vector of workers for each replication and time period
+        alloc : array_like(int, n_reps x t x 10)
+            Returns the optimal assignment of workers for each replication and time period
+        prod : array_like(float, n_reps x t)
+            Returns the output associated with optimal assignment for each replication and time period
+        periods : array_like(int, length n_reps)
+            Period at which each replication stopped by the rules of simt (time, or the first period meeting the
+            convergence criterion if t=0, or the last period simulated if it did not converge within max_periods)
+
+        Notes
+        -----
+        All replications are simulated for the same number of periods, until the last one has stopped. Periods
+        after a replication's stopping period continue its path, so wkrs[i, :periods[i]+1] is a draw of the path
+        simt returns. Draws come from a np.random.Generator, so results are reproducible for a given seed but
+        differ from simt, which uses the global np.random state.
+
+        """
+        rng = np.random.default_rng(seed)
+        size = time + 1 if time > 0 else 64
+        wkrs = np.zeros([n_reps,size,5], dtype=np.int32)
+        alloc = np.zeros([n_reps,size,10], dtype=np.int32)
+        prod = np.zeros([n_reps,size])
+        unemployed = np.zeros([n_reps,size], dtype=np.int32)
+        periods = np.zeros(n_reps, dtype=np.int64)
+        wkrs[:, 0] = np.array([n_new, n_low, n_high, n_neg, n_pos])
+        alloc[:, 0], prod[:, 0] = self.allocate_many(wkrs[:, 0])
+        t = 0
+        while True:
+            t += 1
+            if t == size:
+                size *= 2
+                wkrs, alloc, prod, unemployed = (np.concatenate([x, np.zeros_like(x)], axis=1)
+                                                 for x in (wkrs, alloc, prod, unemployed))
+            # resolve uncertainty, one row of draws per replication
+            learned = rng.binomial(alloc[:, t-1], self.learn)
+            win1 = rng.binomial(learned[:, 0:5], self.p1)
+            lose1 = (learned[:, 0:5]-win1) @ LOSETRANS1
+            chg1 = win1 @ WINTRANS1 + lose1
+            win2 = rng.binomial(learned[:, 5:10], self.p2)
+            chg2 = win2 @ WINTRANS2 + (learned[:, 5:10]-win2) @ LOSETRANS2
+            wkrs[:, t] = chg1 + chg2 + wkrs[:, t-1]
+            dead = rng.binomial(wkrs[:, t], DEATH)
+            dead_unemployed = rng.binomial(unemployed[:, t-1], DEATH)
+            unemployed[:, t] = unemployed[:, t-1] - np.sum(lose1, axis=1) - dead_unemployed
+            wkrs[:, t] -= dead
+            wkrs[:, t, 0] += np.sum(dead, axis=1) + dead_unemployed
+            alloc[:, t], prod[:, t] = self.allocate_many(wkrs[:, t])
+            if t == time:
+                periods[:] = t
+                break
+            if time == 0:
+                done = (periods == 0) & converged(wkrs[:, t-1], wkrs[:, t])
+                periods[done] = t
+                if np.all(periods > 0) or t == max_periods:
+                    periods[periods == 0] = t
+                    break
+        return wkrs[:, :t+1], alloc[:, :t+1], prod[:, :t+1], periods
+
+    def steady_state(self, n_new, n_low, n_high, n_neg, n_pos, tol=1e-6, max_iter=100, method='search'):
+        """
+        Method to find the long-run worker composition of a firm from the expected-value (mean-field) dynamics
+        of simt rather than by simulation
+
+        Parameters
+        ----------
+        n_new, n_low, n_high, n_neg, n_pos : workers of each type at the start (see simt), which fix the total
+                                             number of workers and unemployed
+        tol      : iteration stops when no worker type changes by more than tol between iterations
+        max_iter : upper bound on the number of iterations; RuntimeError is raised if neither a fixed point
+                   nor a cycle is found within it
+        method   : allocation method passed to allocate (see allocate)
+
+        Returns
+        -------
+        wkrs : array_like(float, length 5)
+            Stationary expected number of workers of each type
+        alloc : array_like(float, length 10)
+            Stationary expected assignment of workers to roles
+        prod : scalar(float)
+            Output associated with the stationary assignment
+
+        Notes
+        -----
+        Every random draw of simt (signals, wins and deaths) is replaced by its expectation. Workers are split
+        between roles in the shares of the optimal allocation of the rounded worker vector, which makes the
+        expected dynamics linear for a given allocation, so each iteration solves directly for the stationary
+        worker vector of the current allocation and then reallocates at that vector. The fixed point is reached
+        when the allocation reproduces itself. If the allocation instead cycles (the fixed point lies on the
+        boundary between two allocations) the average of the stationary vectors in the cycle is returned.
+
+        """
+        wkrs = np.array([n_new, n_low, n_high, n_neg, n_pos], dtype=float)
+        total = np.sum(wkrs)
+        visited, solved = [], {}
+        for _ in range(max_iter):
+            state = tuple(np.rint(wkrs).astype(int))
+            share = self._role_share(state, method)
+            # stationary distribution of the period transition x @ trans for workers and unemployed (x[5])
+            trans = np.array([self._expected_step(x, share) for x in np.eye(6)])
+            lhs = (trans - np.eye(6)).T
+            lhs[5] = 1
+            new_wkrs = np.linalg.solve(lhs, np.append(np.zeros(5), total))[0:5]
+            change = np.max(np.abs(new_wkrs - wkrs))
+            if change <= tol:
+                wkrs = new_wkrs
+                break
+            if state in visited:
+                cycle = visited[visited.index(state):]
+                share = np.mean([self._role_share(x, method) for x in cycle], axis=0)
+                wkrs = np.mean([solved[x] for x in cycle], axis=0)
+                break
+            visited.append(state)
+            solved[state] = new_wkrs
+            wkrs = new_wkrs
+        else:
+            raise RuntimeError('steady_state did not converge within {} iterations (last change {:g})'.format(
+                max_iter, change))
+        alloc = np.concatenate([share * wkrs, (1 - share) * wkrs])
+        return wkrs, alloc, self.prod(*alloc)
+
+    def _role_share(self, state, method):
+        """
+        Share of each worker type assigned to role 1 in the optimal allocation of the integer worker vector state
+        """
+        alloc = self.allocate(*state, method=method)[0]
+        n = alloc[0:5] + alloc[5:10]
+        # types with no workers take the role allocate starts them in (steps 1-3)
+        return np.where(n > 0, alloc[0:5] / np.maximum(n, 1), [1.0, 1.0, 0.0, 1.0, 0.0])
+
+    def _expected_step(self, x, share):
+        """
+        Expected value of the workers (x[0:5]) and unemployed (x[5]) after one period of simt when each worker
+        type is split between roles according to share
+        """
+        wkrs, unemployed = x[0:5], x[5]
+        # expected signals, wins and losses by role
+        learned1 = self.learn * share * wkrs
+        learned2 = self.learn * (1 - share) * wkrs
+        win1 = self.p1 * learned1
+        win2 = self.p2 * learned2
+        lose1 = (learned1 - win1) @ LOSETRANS1
+        wkrs = wkrs + win1 @ WINTRANS1 + lose1 + win2 @ WINTRANS2 + (learned2 - win2) @ LOSETRANS2
+        # expected deaths, replaced by new workers
+        dead = DEATH * wkrs
+        dead_unemployed = DEATH * unemployed
+        unemployed = unemployed - np.sum(lose1) - dead_unemployed
+        wkrs = wkrs - dead
+        wkrs[0] += np.sum(dead) + dead_unemployed
+        return np.append(wkrs, unemployed)
+
+    def value(self, alloc, tol=1e-10):
+        """
+        Expected discounted marginal product of a worker of each type and expected discounted output of the firm
+        under the allocation policy alloc (length 10), discounted at rate r (see valuation.value_batch)
+
+        Returns
+        -------
+        worker : array_like(float, length 6)
+            Value of a worker of each type (new, low, high, neg, pos) and of an unemployed worker
+        firm : scalar(float)
+            Value of a firm starting with the workers of alloc: prod of its expected workers along the expected
+            path of the firm, discounted and summed
+
+        """
+        import valuation
+
+        return valuation.value(self, alloc, tol)
+
+
+def success_probs(gamma_l, gamma_m, gamma_h):
+    """
+    Probabilities of success in the low (p1) and high (p2) job type of each worker type, for population shares
+    given as scalars (length 5 results) or arrays (worker type on the last axis)
+    """
+    gam_l, gam_m, gam_h = np.broadcast_arrays(*(np.asarray(g, dtype=float) for g in (gamma_l, gamma_m, gamma_h)))
+    one, zero = np.ones_like(gam_l), np.zeros_like(gam_l)
+    p1 = np.stack([gam_m + gam_h, one, one, gam_m / (gam_l + gam_m), one], axis=-1)
+    p2 = np.stack([gam_h, zero, one, zero, gam_h / (gam_h + gam_m)], axis=-1)
+    return p1, p2
+
+
+def production(a, beta, p1, p2, v1_inpt, v2_inpt, alloc):
+    """
+    Model.prod_batch for model parameters that are scalars (p1, p2, v1_inpt, v2_inpt of length 5) or given for
+    each allocation (a and beta of length N, the others N x 5), with the same zero-input contract
+    """
+    alloc = np.asarray(alloc, dtype=float).reshape(-1, 10)
+    a, beta = (np.reshape(np.asarray(x, dtype=float), -1) for x in (a, beta))
+    p1, p2, v1_inpt, v2_inpt = (np.reshape(x, (-1, 5)) for x in (p1, p2, v1_inpt, v2_inpt))
+    n1 = alloc[:, 0:5]
+    n2 = alloc[:, 5:10]
+    e_n1, e_n2 = np.sum(p1 * n1, axis=1), np.sum(p2 * n2, axis=1)
+    v_n1, v_n2 = np.sum(v1_inpt * n1, axis=1), np.sum(v2_inpt * n2, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        adj_1 = 1 - beta * (1-beta) * v_n1 / (2 * e_n1 ** 2)
+        adj_2 = 1 - beta * (1-beta) * v_n2 / (2 * e_n2 ** 2)
+        production = a * e_n1 ** beta * e_n2 ** (1-beta) * adj_1 * adj_2
+    return np.where((e_n1 == 0) | (e_n2 == 0), 0.0, production)
+
+
+def marginal_products(a, beta, p1, p2, v1_inpt, v2_inpt, alloc):
+    """
+    Model.marginal_products for model parameters that are scalars (p1, p2, v1_inpt, v2_inpt of length 5) or
+    given for each allocation (a and beta of length N, the others N x 5)
+    """
+    alloc = np.asarray(alloc, dtype=float).reshape(-1, 10)
+    a, beta = (np.reshape(np.asarray(x, dtype=float), (-1, 1)) for x in (a, beta))
+    p1, p2, v1_inpt, v2_inpt = (np.reshape(x, (-1, 5)) for x in (p1, p2, v1_inpt, v2_inpt))
+    n1 = alloc[:, 0:5]
+    n2 = alloc[:, 5:10]
+
+    def expect(p, n):
+        # weighted sum over worker types in a fixed order, as a column
+        return (p[:, 0] * n[:, 0] + p[:, 1] * n[:, 1] + p[:, 2] * n[:, 2] + p[:, 3] * n[:, 3]
+                + p[:, 4] * n[:, 4])[:, None]
+
+    e_n1, e_n2 = expect(p1, n1), expect(p2, n2)
+    v_n1, v_n2 = expect(v1_inpt, n1), expect(v2_inpt, n2)
+    c = beta * (1-beta)
+    adj_1 = 1 - c * v_n1 / (2 * e_n1 ** 2)
+    adj_2 = 1 - c * v_n2 / (2 * e_n2 ** 2)
+    base = a * e_n1 ** beta * e_n2 ** (1-beta)
+
+    # derivatives of the adjustments with respect to each input, N x 5
+    d_adj_1 = -c / 2 * (v1_inpt / e_n1 ** 2 - 2 * (v_n1 / e_n1 ** 3) * p1)
+    d_adj_2 = -c / 2 * (v2_inpt / e_n2 ** 2 - 2 * (v_n2 / e_n2 ** 3) * p2)
+    mp1 = base * adj_2 * (beta * p1 / e_n1 * adj_1 + d_adj_1)
+    mp2 = base * adj_1 * ((1-beta) * p2 / e_n2 * adj_2 + d_adj_2)
+    return np.hstack([mp1, mp2])
+
+
+def _gallop(pred, lo, hi):
+    """
+    Smallest k in [lo, hi) with pred(k) true, or hi if there is none, for pred false then true on [lo, hi).
+    Probes lo, lo+1, lo+3, lo+7, ... and then bisects, so it takes O(log(k - lo)) evaluations of pred.
+    """
+    prev, k = lo - 1, lo
+    while k < hi and not pred(k):
+        prev, k = k, 2 * k - lo + 1
+    lo, hi = prev + 1, min(k, hi)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if pred(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def converged(prev, wkrs):
+    """
+    Convergence rule of simt: the total number of workers changed by at most max(5, 5%) between periods.
+    Worker states may be stacked along leading axes (worker type on the last axis), giving one result per state.
+    """
+    return np.sum(np.subtract(wkrs, prev), axis=-1) <= np.maximum(5, np.sum(wkrs, axis=-1) * 0.05)
@@ -0,0 +1,147 @@
+"""
+Filename: policy.py
+
+Author: Brian Held
+
+Precomputed allocation policy of a Model over a bounded grid of worker states, stored as memory-mapped .npy
+files so that allocate and simt in any number of processes can look allocations up without recomputing them
+
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import model
+
+
+def param_hash(m):
+    """
+    Hash of the parameters of Model m, identifying the policy tables built for it
+    """
+    params = {name: float(value) for name, value in m.params().items()}
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def _fill(path, params, first, last, chunk_size):
+    # worker process entry point: allocate all states with n_new in [first, last) into the mapped tables
+    m = model.Model(**params)
+    alloc = np.load(os.path.join(path, 'alloc.npy'), mmap_mode='r+')
+    prod = np.load(os.path.join(path, 'prod.npy'), mmap_mode='r+')
+    # n_new is the outermost axis, so the block is a contiguous range of flat state indices
+    shape = alloc.shape[:5]
+    inner = int(np.prod(shape[1:]))
+    flat_alloc = alloc.reshape(-1, 10)
+    flat_prod = prod.reshape(-1)
+    for start in range(first * inner, last * inner, chunk_size):
+        index = np.arange(start, min(start + chunk_size, last * inner))
+        flat_alloc[index], flat_prod[index] = m.allocate_many(np.column_stack(np.unravel_index(index, shape)))
+    alloc.flush()
+    prod.flush()
+
+
+def build_policy(m, bounds, path, workers=None, chunk_size=10000):
+    """
+    Compute the greedy allocation of every worker state within bounds and save it as a policy table
+
+    Parameters
+    ----------
+    m          : Model instance
+    bounds     : largest number of workers of each type (new, low, high, neg, pos) in the table
+    path       : directory of the table files (alloc.npy, prod.npy and meta.json)
+    workers    : number of worker processes (all cores if None, in process if 1)
+    chunk_size : number of states passed to allocate_many at a time
+
+    Returns
+    -------
+    table : PolicyTable
+        The table, opened for m
+
+    Notes
+    -----
+    The table holds prod(bounds + 1) states, using 88 bytes per state. Worker processes fill disjoint blocks of
+    new type workers directly into the memory-mapped files. meta.json, which holds the parameter hash checked
+    by PolicyTable, is written last, so an interrupted build is never mistaken for a complete table.
+
+    """
+    bounds = tuple(int(b) for b in bounds)
+    shape = tuple(b + 1 for b in bounds)
+    os.makedirs(path, exist_ok=True)
+    meta = os.path.join(path, 'meta.json')
+    if os.path.exists(meta):
+        os.remove(meta)
+    np.lib.format.open_memmap(os.path.join(path, 'alloc.npy'), mode='w+', dtype=np.int64, shape=shape + (10,))
+    np.lib.format.open_memmap(os.path.join(path, 'prod.npy'), mode='w+', dtype=np.float64, shape=shape)
+
+    n_tasks = 1 if workers == 1 else 4 * (workers or os.cpu_count())
+    blocks = np.array_split(np.arange(shape[0]), min(shape[0], n_tasks))
+    tasks = [(path, m.params(), block[0], block[-1] + 1, chunk_size) for block in blocks if len(block)]
+    if workers == 1:
+        for task in tasks:
+            _fill(*task)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_fill, *zip(*tasks)))
+
+    with open(meta, 'w') as f:
+        json.dump({'hash': param_hash(m), 'params': m.params(), 'bounds': bounds}, f)
+    return PolicyTable(path, m)
+
+
+class PolicyTable(object):
+    """
+    Allocation policy table built by build_policy, opened read-only as memory maps
+
+    Parameters
+    ----------
+    path : directory of the table
+    m    : Model instance the table is used for; raises ValueError if the table was built for other parameters
+
+    Attributes
+    ----------
+    alloc : array_like(int, bounds + 1 x 10)
+        Greedy allocation of each worker state, indexed by (n_new, n_low, n_high, n_neg, n_pos)
+    prod : array_like(float, bounds + 1)
+        Output of each allocation
+    bounds : tuple(int)
+        Largest number of workers of each type in the table
+    key : str
+        Hash of the parameters the table was built for
+
+    """
+
+    def __init__(self, path, m):
+        meta = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta):
+            raise ValueError('{} is not a complete policy table'.format(path))
+        with open(meta) as f:
+            meta = json.load(f)
+        self.key = meta['hash']
+        if not self.matches(m):
+            raise ValueError('policy table {} was built for parameters {}, not {}'.format(
+                path, meta['params'], m.params()))
+        self.bounds = tuple(meta['bounds'])
+        self.alloc = np.load(os.path.join(path, 'alloc.npy'), mmap_mode='r')
+        self.prod = np.load(os.path.join(path, 'prod.npy'), mmap_mode='r')
+
+    def matches(self, m):
+        """
+        True if the table was built for the parameters of Model m
+        """
+        return self.key == param_hash(m)
+
+    def contains(self, states):
+        """
+        True for each row of states (K x 5) within the bounds of the table
+        """
+        states = np.asarray(states).reshape(-1, 5)
+        return np.all((states >= 0) & (states <= self.bounds), axis=1)
+
+    def lookup(self, states):
+        """
+        Allocations (K x 10) and outputs (K) of the rows of states (K x 5), which must be within the bounds
+        """
+        index = tuple(np.asarray(states, dtype=np.int64).reshape(-1, 5).T)
+        return np.array(self.alloc[index]), np.array(self.prod[index])
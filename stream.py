@@ -0,0 +1,141 @@
+"""
+Filename: stream.py
+
+Author: Brian Held
+
+Reducers and writers for the periods yielded by Model.simt_iter, so that long simulations can be summarized or
+saved at intervals without holding every period in memory
+
+"""
+import numpy as np
+
+import model
+
+# Fields of a period yielded by Model.simt_iter
+FIELDS = ('t', 'wkrs', 'alloc', 'prod', 'unemployed')
+
+# Record layout of one period in a snapshot file
+SNAPSHOT_DTYPE = np.dtype([('t', np.int64), ('wkrs', np.int32, 5), ('alloc', np.int32, 10), ('prod', np.float64),
+                           ('unemployed', np.int32)])
+
+
+class RunningStats(object):
+    """
+    Running mean and variance of one field of the periods (Welford's algorithm)
+
+    Parameters
+    ----------
+    field : name of the field in FIELDS, e.g. 'prod' for output or 'wkrs' for each worker type
+
+    Attributes
+    ----------
+    count : number of periods seen
+    mean : array_like(float)
+        Mean of the field over the periods seen
+    var : array_like(float)
+        Variance of the field over the periods seen (population variance, nan before the first period)
+
+    """
+
+    def __init__(self, field='prod'):
+        self.field = field
+        self._index = FIELDS.index(field)
+        self.count = 0
+        self.mean = np.nan
+        self._m2 = 0.0
+
+    def update(self, period):
+        x = np.asarray(period[self._index], dtype=float)
+        self.count += 1
+        if self.count == 1:
+            self.mean = x.copy()
+            self._m2 = np.zeros_like(x)
+            return
+        delta = x - self.mean
+        self.mean = self.mean + delta / self.count
+        self._m2 = self._m2 + delta * (x - self.mean)
+
+    @property
+    def var(self):
+        return self._m2 / self.count if self.count else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+
+class TimeToConvergence(object):
+    """
+    First period at which the workers meet the convergence rule of simt (model.converged)
+
+    Attributes
+    ----------
+    period : first period meeting the rule, or None if none has so far
+
+    """
+
+    def __init__(self):
+        self.period = None
+        self._prev = None
+
+    def update(self, period):
+        t, wkrs = period[0], period[1]
+        if self.period is None and self._prev is not None and model.converged(self._prev, wkrs):
+            self.period = t
+        self._prev = np.array(wkrs)
+
+
+class SnapshotWriter(object):
+    """
+    Append every nth period to a binary file of SNAPSHOT_DTYPE records (read back with read_snapshots)
+
+    Parameters
+    ----------
+    path  : file to write, replaced if it exists
+    every : write the periods t with t % every == 0
+
+    """
+
+    def __init__(self, path, every=1):
+        self.path, self.every = path, every
+        self._file = open(path, 'wb')
+        self._record = np.zeros(1, dtype=SNAPSHOT_DTYPE)
+
+    def update(self, period):
+        if period[0] % self.every == 0:
+            for name, value in zip(FIELDS, period):
+                self._record[name] = value
+            self._record.tofile(self._file)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_snapshots(path, mmap=False):
+    """
+    Records written by SnapshotWriter as a structured array with fields FIELDS (memory-mapped if mmap)
+    """
+    if mmap:
+        return np.memmap(path, dtype=SNAPSHOT_DTYPE, mode='r')
+    return np.fromfile(path, dtype=SNAPSHOT_DTYPE)
+
+
+def consume(periods, *reducers):
+    """
+    Feed every period of an iterable such as Model.simt_iter to each reducer and return the reducers
+
+    Examples
+    --------
+    >>> stats, conv = consume(m.simt_iter(100, 0, 0, 0, 0, time=10**6), RunningStats('prod'), TimeToConvergence())
+
+    """
+    for period in periods:
+        for reducer in reducers:
+            reducer.update(period)
+    return reducers
@@ -0,0 +1,199 @@
+"""
+Filename: sweep.py
+
+Author: Brian Held
+
+Comparative statics of the learning model: runs one analysis of a Model at every point of a parameter grid,
+spread over a process pool, and collects the results into a columnar .npz file
+
+"""
+import itertools
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import model
+from cache import ResultCache
+
+# Model parameters that can be swept, in the order of the Model constructor
+PARAMS = ('gamma_l', 'gamma_m', 'gamma_h', 'a', 'beta', 'r', 'learn')
+
+ANALYSES = ('allocate', 'simt', 'steady_state')
+
+
+def grid_points(grid):
+    """
+    Parameter points of a grid
+
+    Parameters
+    ----------
+    grid : dict
+        Values to sweep for each parameter name in PARAMS. Parameters not in grid keep their Model default.
+
+    Returns
+    -------
+    points : array_like(float, N x 7)
+        One row per combination of the grid values, columns in the order of PARAMS
+
+    """
+    unknown = set(grid) - set(PARAMS)
+    if unknown:
+        raise ValueError('unknown parameters {}, expected some of {}'.format(sorted(unknown), PARAMS))
+    defaults = model.Model.__init__.__defaults__
+    axes = [np.atleast_1d(grid.get(name, default)) for name, default in zip(PARAMS, defaults)]
+    return np.array(list(itertools.product(*axes)), dtype=float).reshape(-1, len(PARAMS))
+
+
+def run_point(params, analysis, state, time=0, seed=None, cache=None, method='greedy'):
+    """
+    Run one analysis for one parameter point
+
+    Parameters
+    ----------
+    params   : values of the parameters in PARAMS
+    analysis : one of ANALYSES
+    state    : workers of each type (new, low, high, neg, pos)
+    time     : periods to simulate for analysis='simt' (until convergence if 0)
+    seed     : seed of np.random before the simt run
+    cache    : ResultCache the allocate, steady_state and simt results are looked up in and stored to
+    method   : allocation method of analysis='allocate' ('greedy' or 'search', see Model.allocate)
+
+    Returns
+    -------
+    result : dict
+        Output columns of the analysis for this point (see sweep)
+
+    """
+    m = model.Model(*params)
+    if cache is None:
+        def call(name, /, *args, seed=None, **kwargs):
+            if seed is not None:
+                np.random.seed(seed)
+            return getattr(m, name)(*args, **kwargs)
+    else:
+        def call(name, /, *args, **kwargs):
+            return cache.call(m, name, *args, **kwargs)
+    state = tuple(int(n) for n in state)
+    if analysis == 'allocate':
+        alloc, prod = call('allocate', *state, method=method)
+        return {'alloc': np.asarray(alloc), 'prod': prod}
+    elif analysis == 'steady_state':
+        wkrs, alloc, prod = call('steady_state', *state)
+        return {'wkrs': wkrs, 'alloc': alloc, 'prod': prod}
+    elif analysis == 'simt':
+        wkrs, alloc, prod = call('simt', *state, time=time, seed=seed)
+        return {'wkrs': wkrs[-1], 'alloc': alloc[-1], 'prod': prod[-1], 'mean_prod': np.mean(prod),
+                'periods': len(prod) - 1}
+    raise ValueError('analysis must be one of {}, got {!r}'.format(ANALYSES, analysis))
+
+
+def _run_chunk(points, first, analysis, state, time, seed, cache, method):
+    # worker process entry point: run the analysis for a block of points and stack the results by column
+    cache = None if cache is None else ResultCache(cache)
+    results = []
+    for i, params in enumerate(points):
+        point_seed = None if seed is None else [seed, first + i]
+        results.append(run_point(params, analysis, state, time, point_seed, cache, method))
+    columns = {name: points[:, j] for j, name in enumerate(PARAMS)}
+    for key in results[0]:
+        columns[key] = np.array([r[key] for r in results])
+    return columns
+
+
+def _save(path, columns):
+    # write to a temporary file first so an interrupted run never leaves a truncated result behind
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, **columns)
+    os.replace(tmp, path)
+
+
+def sweep(grid, analysis, state, out, time=0, seed=None, workers=None, chunk_size=50, progress=True, cache=None,
+          method='greedy'):
+    """
+    Run an analysis at every point of a parameter grid over a process pool
+
+    Parameters
+    ----------
+    grid       : dict of values for each swept parameter (see grid_points)
+    analysis   : 'allocate', 'simt' or 'steady_state', run for the worker state at each point
+    state      : workers of each type (new, low, high, neg, pos)
+    out        : path of the .npz file of results
+    time       : periods to simulate for analysis='simt' (until convergence if 0)
+    seed       : base seed for analysis='simt'; point i is simulated with np.random.seed([seed, i])
+    workers    : number of worker processes (all cores if None, in process if 1)
+    chunk_size : number of points per task
+    progress   : report completed points on stderr if True, or call progress(done, total)
+    cache      : directory of a ResultCache (see cache.py) shared by the worker processes, so points computed
+                 by earlier sweeps are not computed again (simt results only with a seed)
+    method     : allocation method of analysis='allocate' ('greedy' or 'search', see Model.allocate)
+
+    Returns
+    -------
+    results : dict
+        One array per column, one row per grid point in the order of grid_points: the parameters in PARAMS, and
+        alloc, prod (allocate), wkrs, alloc, prod (steady_state) or the final period's wkrs, alloc, prod,
+        the mean output and number of periods simulated (simt)
+
+    Notes
+    -----
+    Each finished chunk of points is saved under out + '.parts' as soon as it is done. Running the same sweep
+    again after an interruption skips the chunks already saved (a different sweep to the same out raises
+    ValueError). The parts are merged into out and removed when all points are done.
+
+    """
+    if analysis not in ANALYSES:
+        raise ValueError('analysis must be one of {}, got {!r}'.format(ANALYSES, analysis))
+    points = grid_points(grid)
+    parts = out + '.parts'
+    os.makedirs(parts, exist_ok=True)
+    # saved parts belong to the same sweep only if the points and settings match
+    setup = os.path.join(parts, 'setup.npz')
+    settings = np.array([analysis, repr(tuple(state)), repr(time), repr(seed), repr(chunk_size), method])
+    if os.path.exists(setup):
+        with np.load(setup) as saved:
+            if not (np.array_equal(saved['points'], points) and np.array_equal(saved['settings'], settings)):
+                raise ValueError('{} holds results of a different sweep'.format(parts))
+    else:
+        _save(setup, {'points': points, 'settings': settings})
+    chunks = [(first, os.path.join(parts, 'chunk_{:06d}.npz'.format(first // chunk_size)))
+              for first in range(0, len(points), chunk_size)]
+    todo = [(first, path) for first, path in chunks if not os.path.exists(path)]
+
+    if progress is True:
+        def progress(done, total):
+            print('sweep: {}/{} points'.format(done, total), file=sys.stderr)
+    done = len(points) - sum(len(points[first:first + chunk_size]) for first, _ in todo)
+    if progress and done:
+        progress(done, len(points))
+
+    def finish(first, path, columns):
+        nonlocal done
+        _save(path, columns)
+        done += len(columns[PARAMS[0]])
+        if progress:
+            progress(done, len(points))
+
+    args = [(first, path, (points[first:first + chunk_size], first, analysis, state, time, seed, cache, method))
+            for first, path in todo]
+    if workers == 1:
+        for first, path, task in args:
+            finish(first, path, _run_chunk(*task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_run_chunk, *task): (first, path) for first, path, task in args}
+            for future in as_completed(futures):
+                finish(*futures[future], future.result())
+
+    results = {}
+    for _, path in chunks:
+        with np.load(path) as part:
+            for key in part.files:
+                results.setdefault(key, []).append(part[key])
+    results = {key: np.concatenate(values) for key, values in results.items()}
+    _save(out, results)
+    shutil.rmtree(parts)
+    return results
@@ -16,6 +16,7 @@ http://quant-econ.net/py/career.html
 """
 
 from textwrap import dedent
+import time
 import numpy as np
 from quantecon.distributions import BetaBinomial
 
@@ -94,6 +95,15 @@ class CareerWorkerProblem(object):
         return dedent(m.format(b=self.beta, B=self.B, n=self.N, fa=self._F_a,
                                fb=self._F_b, ga=self._G_a, gb=self._G_b))
 
+    def params(self):
+        """
+        Parameters of the problem as a dict of CareerWorkerProblem
+        keyword arguments
+        """
+        return {'B': self.B, 'beta': self.beta, 'N': self.N,
+                'F_a': self._F_a, 'F_b': self._F_b, 'G_a': self._G_a,
+                'G_b': self._G_b}
+
     def bellman_operator(self, v):
         """
         The Bellman operator for the career / job choice model of Neal.
@@ -110,21 +120,8 @@ class CareerWorkerProblem(object):
             The updated value function Tv as an array of shape v.shape
 
         """
-        new_v = np.empty(v.shape)
-        for i in range(self.N):
-            for j in range(self.N):
-                # stay put
-                v1 = self.theta[i] + self.epsilon[j] + self.beta * v[i, j]
-
-                # new job
-                v2 = (self.theta[i] + self.G_mean + self.beta *
-                      np.dot(v[i, :], self.G_probs))
-
-                # new life
-                v3 = (self.G_mean + self.F_mean + self.beta *
-                      np.dot(self.F_probs, np.dot(v, self.G_probs)))
-                new_v[i, j] = max(v1, v2, v3)
-        return new_v
+        v1, v2, v3 = self._action_values(v)
+        return np.maximum(np.maximum(v1, v2), v3)
 
     def get_greedy(self, v):
         """
@@ -147,20 +144,141 @@ class CareerWorkerProblem(object):
             life'
 
         """
-        policy = np.empty(v.shape, dtype=int)
-        for i in range(self.N):
-            for j in range(self.N):
-                v1 = self.theta[i] + self.epsilon[j] + self.beta * v[i, j]
-                v2 = (self.theta[i] + self.G_mean + self.beta *
-                      np.dot(v[i, :], self.G_probs))
-                v3 = (self.G_mean + self.F_mean + self.beta *
-                      np.dot(self.F_probs, np.dot(v, self.G_probs)))
-                if v1 > max(v2, v3):
-                    action = 1
-                elif v2 > max(v1, v3):
-                    action = 2
-                else:
-                    action = 3
-                policy[i, j] = action
-
-        return policy
\ No newline at end of file
+        v1, v2, v3 = self._action_values(v)
+        return np.where(v1 > np.maximum(v2, v3), 1,
+                        np.where(v2 > np.maximum(v1, v3), 2, 3))
+
+    def solve(self, v_init=None, tol=1e-4, max_iter=1000, method='vfi',
+              eval_steps=20):
+        r"""
+        Solve for the value function and optimal policy.
+
+        Parameters
+        ----------
+        v_init : array_like(float), optional(default=None)
+            Initial guess of the value function, e.g. the solution for
+            nearby parameters (warm start). Zeros if None.
+        tol : scalar(float), optional(default=1e-4)
+            Stop when the sup norm of the change in v between
+            successive Bellman steps is below tol
+        max_iter : scalar(int), optional(default=1000)
+            Maximum number of Bellman steps
+        method : str, optional(default='vfi')
+            'vfi' for value function iteration (successive
+            approximation) or 'mpi' for modified policy iteration
+            (Howard improvement)
+        eval_steps : scalar(int), optional(default=20)
+            Number of policy evaluation sweeps after each Bellman step
+            when method='mpi'
+
+        Returns
+        -------
+        v : array_like(float)
+            A 2D NumPy array with the approximate fixed point of the
+            Bellman operator
+        policy : array_like(int)
+            The greedy policy for v (see get_greedy)
+        info : dict
+            'converged' (bool), 'error' (sup norm of the last change),
+            'bellman_steps', 'eval_sweeps' and 'elapsed' (seconds)
+
+        Notes
+        -----
+        With method='mpi' each Bellman step also gives the greedy
+        policy, which is then evaluated with eval_steps sweeps of the
+        policy operator :math:`T_\sigma`. A sweep skips the maximization
+        over actions, and the sweeps move v most of the way to the value
+        of the policy, so far fewer Bellman steps are needed when beta
+        is close to 1.
+
+        """
+        if method not in ('vfi', 'mpi'):
+            raise ValueError("method must be 'vfi' or 'mpi'")
+        start = time.perf_counter()
+        v = np.zeros((self.N, self.N)) if v_init is None else \
+            np.array(v_init, dtype=float)
+        bellman_steps, eval_sweeps = 0, 0
+        error = np.inf
+        while bellman_steps < max_iter:
+            v1, v2, v3 = self._action_values(v)
+            new_v = np.maximum(np.maximum(v1, v2), v3)
+            bellman_steps += 1
+            error = np.max(np.abs(new_v - v))
+            v = new_v
+            if error < tol:
+                break
+            if method == 'mpi':
+                policy = np.where(v1 > np.maximum(v2, v3), 1,
+                                  np.where(v2 > np.maximum(v1, v3), 2, 3))
+                rewards = self._policy_rewards(policy)
+                for _ in range(eval_steps):
+                    v = self._policy_sweep(v, policy, rewards)
+                eval_sweeps += eval_steps
+
+        info = {'converged': bool(error < tol), 'error': error,
+                'bellman_steps': bellman_steps, 'eval_sweeps': eval_sweeps,
+                'elapsed': time.perf_counter() - start}
+        return v, self.get_greedy(v), info
+
+    def policy_operator(self, v, policy):
+        r"""
+        The operator :math:`T_\sigma` giving the value of following
+        policy for one period and then receiving v.
+
+        Parameters
+        ----------
+        v : array_like(float)
+            A 2D NumPy array representing the value function
+        policy : array_like(int)
+            A 2D NumPy array of actions 1, 2, 3 (see get_greedy)
+
+        Returns
+        -------
+        new_v : array_like(float)
+            The updated value function as an array of shape v.shape
+
+        """
+        return self._policy_sweep(v, policy, self._policy_rewards(policy))
+
+    def _policy_rewards(self, policy):
+        """
+        Current period reward of following policy at every grid point
+        """
+        return np.where(policy == 1, self.theta[:, None] + self.epsilon,
+                        np.where(policy == 2,
+                                 (self.theta + self.G_mean)[:, None],
+                                 self.G_mean + self.F_mean))
+
+    def _policy_sweep(self, v, policy, rewards):
+        """
+        One application of the policy operator given the rewards of
+        policy. Unlike the Bellman operator it needs no maximization
+        and takes a single matrix-vector product.
+        """
+        w = np.dot(v, self.G_probs)    # expected v on a new job
+        continuation = np.where(policy == 1, v,
+                                np.where(policy == 2, w[:, None],
+                                         np.dot(self.F_probs, w)))
+        return rewards + self.beta * continuation
+
+    def _action_values(self, v):
+        """
+        Values of the three actions at every grid point, as arrays
+        broadcasting to v.shape: v1 (stay put) is N x N, v2 (new job)
+        depends only on theta (N x 1) and v3 (new life) on neither (a
+        scalar)
+        """
+        # stay put
+        v1 = self.theta[:, None] + self.epsilon[None, :] + self.beta * v
+
+        # new job: one inner product np.dot(v[i, :], G_probs) per row,
+        # stacked as a batch of 1 x N by N x 1 products rather than
+        # v @ G_probs, so each row is rounded exactly as in the loop
+        # version of the operator (bit for bit)
+        w = np.matmul(v[:, None, :], self.G_probs[:, None])[:, 0, 0]
+        v2 = (self.theta + self.G_mean + self.beta * w)[:, None]
+
+        # new life
+        v3 = (self.G_mean + self.F_mean + self.beta *
+              np.dot(self.F_probs, np.dot(v, self.G_probs)))
+        return v1, v2, v3
@@ -0,0 +1,50 @@
+"""
+Filename: test_allocate_cache.py
+
+Author: Brian Held
+
+Least recently used cache of allocate results (Model(cache_size=...))
+
+"""
+import numpy as np
+
+import model
+
+
+def test_cache_counts():
+    m = model.Model(cache_size=2)
+    m.allocate(10, 0, 0, 0, 0)
+    m.allocate(10, 0, 0, 0, 0)
+    assert m.cache_info() == model.CacheInfo(hits=1, misses=1, evictions=0, maxsize=2, currsize=1)
+    m.allocate(20, 0, 0, 0, 0)
+    m.allocate(30, 0, 0, 0, 0)
+    assert m.cache_info() == model.CacheInfo(hits=1, misses=3, evictions=1, maxsize=2, currsize=2)
+    # (10, ...) was least recently used and evicted
+    m.allocate(10, 0, 0, 0, 0)
+    assert m.cache_info().misses == 4
+    m.cache_clear()
+    assert m.cache_info() == model.CacheInfo(hits=0, misses=0, evictions=0, maxsize=2, currsize=0)
+
+
+def test_cached_results_equal_allocate(m):
+    cached = model.Model(cache_size=100)
+    states = np.random.default_rng(6).integers(0, 50, size=(30, 5))
+    for s in np.vstack([states, states]):
+        alloc, prod = cached.allocate(*s)
+        expected, expected_prod = m.allocate(*s)
+        np.testing.assert_array_equal(alloc, expected)
+        assert prod == expected_prod
+    assert cached.cache_info().hits == 30
+    alloc, prod = cached.allocate_many(states)
+    np.testing.assert_array_equal(alloc, m.allocate_many(states)[0])
+
+
+def test_cache_cleared_on_parameter_change():
+    m = model.Model(cache_size=10)
+    before = m.allocate(40, 0, 10, 0, 20)
+    m.beta = 0.4
+    assert m.cache_info().currsize == 0
+    after = m.allocate(40, 0, 10, 0, 20)
+    expected = model.Model(beta=0.4).allocate(40, 0, 10, 0, 20)
+    np.testing.assert_array_equal(after[0], expected[0])
+    assert after[1] == expected[1] != before[1]
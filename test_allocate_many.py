@@ -0,0 +1,24 @@
+"""
+Filename: test_allocate_many.py
+
+Author: Brian Held
+
+Model.allocate_many gives the allocations of Model.allocate
+
+"""
+import numpy as np
+import pytest
+
+
+def test_allocate_many_equals_allocate_small(m, small_states, greedy_small):
+    alloc, prod = m.allocate_many(small_states)
+    np.testing.assert_array_equal(alloc, greedy_small)
+
+
+def test_allocate_many_equals_allocate_random(m):
+    states = np.random.default_rng(1).integers(0, 500, size=(50, 5))
+    alloc, prod = m.allocate_many(states)
+    for s, a, p in zip(states, alloc, prod):
+        greedy, greedy_prod = m.allocate(*s)
+        np.testing.assert_array_equal(a, greedy)
+        assert p == pytest.approx(greedy_prod, rel=1e-12)
@@ -0,0 +1,30 @@
+"""
+Filename: test_allocate_search.py
+
+Author: Brian Held
+
+allocate(..., method='search') gives the allocations of the greedy algorithm
+
+"""
+import numpy as np
+
+
+def test_search_equals_greedy_small(m, small_states, greedy_small):
+    search = np.array([m.allocate(*s, method='search')[0] for s in small_states])
+    np.testing.assert_array_equal(search, greedy_small)
+
+
+def test_search_equals_greedy_random(m):
+    # allocate_many gives the greedy allocations (see test_allocate_many) and is faster for many states
+    states = np.random.default_rng(2).integers(0, 5000, size=(50, 5))
+    greedy = m.allocate_many(states)[0]
+    search = np.array([m.allocate(*s, method='search')[0] for s in states])
+    np.testing.assert_array_equal(search, greedy)
+
+
+def test_search_equals_greedy_large(m):
+    rng = np.random.default_rng(3)
+    states = np.vstack([rng.integers(0, 100000, size=(2, 5)), rng.integers(0, 10000, size=(20, 5))])
+    greedy = m.allocate_many(states)[0]
+    search = np.array([m.allocate(*s, method='search')[0] for s in states])
+    np.testing.assert_array_equal(search, greedy)
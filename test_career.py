@@ -0,0 +1,45 @@
+"""
+Filename: test_career.py
+
+Author: Brian Held
+
+CareerWorkerProblem of test.py: the vectorized Bellman operator and greedy policy
+
+"""
+import numpy as np
+import pytest
+
+from test import CareerWorkerProblem
+
+
+def loop_bellman(cp, v):
+    # Bellman operator and greedy policy of CareerWorkerProblem before vectorization
+    new_v = np.empty(v.shape)
+    policy = np.empty(v.shape, dtype=int)
+    for i in range(cp.N):
+        for j in range(cp.N):
+            v1 = cp.theta[i] + cp.epsilon[j] + cp.beta * v[i, j]
+            v2 = cp.theta[i] + cp.G_mean + cp.beta * np.dot(v[i, :], cp.G_probs)
+            v3 = cp.G_mean + cp.F_mean + cp.beta * np.dot(cp.F_probs, np.dot(v, cp.G_probs))
+            new_v[i, j] = max(v1, v2, v3)
+            policy[i, j] = 1 if v1 > max(v2, v3) else 2 if v2 > max(v1, v3) else 3
+    return new_v, policy
+
+
+@pytest.mark.parametrize('N', [10, 50])
+def test_bellman_equals_loop(N):
+    cp = CareerWorkerProblem(N=N)
+    for v in (np.zeros((N, N)), np.random.default_rng(N).normal(scale=10, size=(N, N))):
+        new_v, policy = loop_bellman(cp, v)
+        np.testing.assert_array_equal(cp.bellman_operator(v), new_v)
+        np.testing.assert_array_equal(cp.get_greedy(v), policy)
+
+
+def test_solve_vfi_and_mpi_agree():
+    cp = CareerWorkerProblem(N=30)
+    v_vfi, policy_vfi, info_vfi = cp.solve(tol=1e-8, method='vfi')
+    v_mpi, policy_mpi, info_mpi = cp.solve(tol=1e-8, method='mpi')
+    assert info_vfi['converged'] and info_mpi['converged']
+    assert info_mpi['bellman_steps'] < info_vfi['bellman_steps']
+    np.testing.assert_allclose(v_mpi, v_vfi, atol=1e-5)
+    np.testing.assert_array_equal(policy_mpi, policy_vfi)
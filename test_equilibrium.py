@@ -0,0 +1,25 @@
+"""
+Filename: test_equilibrium.py
+
+Author: Brian Held
+
+Output of firms allocating their own workers, and the split of workers between them
+
+"""
+import numpy as np
+
+import equilibrium
+
+
+def test_firm_prod_greedy_equals_search(m):
+    states = np.random.default_rng(5).integers(0, 300, size=(40, 5))
+    np.testing.assert_allclose(equilibrium.firm_prod(m, states, method='greedy'),
+                               equilibrium.firm_prod(m, states, method='search'), rtol=1e-12)
+
+
+def test_solve_split_keeps_workers(m):
+    wkrs = np.array([60, 20, 10, 5, 30])
+    split, prod, single, multiple = equilibrium.solve_split(m, wkrs, starts=3)
+    np.testing.assert_array_equal(np.sum(split, axis=0), wkrs)
+    assert np.all(split >= 0)
+    assert np.sum(prod) >= single * (1 - 1e-9)
@@ -0,0 +1,49 @@
+"""
+Filename: test_kernels.py
+
+Author: Brian Held
+
+Model(backend='numba') gives bit for bit the results of the NumPy backend (skipped without Numba)
+
+"""
+import numpy as np
+import pytest
+
+import kernels
+import model
+
+
+@pytest.fixture(scope='module')
+def m_numba():
+    if not kernels.HAVE_NUMBA:
+        pytest.skip('Numba is not installed')
+    return model.Model(backend='numba')
+
+
+def test_numba_prod_bitwise(m, m_numba):
+    allocs = np.random.default_rng(3).integers(1, 1000, size=(2000, 10))
+    for a in allocs:
+        assert m_numba.prod(*a) == m.prod(*a)
+    # no expected input in role 2 gives nan in both backends rather than an error
+    with np.errstate(divide='ignore', invalid='ignore'):
+        assert np.isnan(m.prod(10, 0, 0, 0, 0, 0, 0, 0, 0, 0))
+    assert np.isnan(m_numba.prod(10, 0, 0, 0, 0, 0, 0, 0, 0, 0))
+
+
+def test_numba_allocate_bitwise(m, m_numba, small_states, greedy_small):
+    for s, expected in zip(small_states, greedy_small):
+        np.testing.assert_array_equal(m_numba.allocate(*s)[0], expected)
+    for s in np.random.default_rng(4).integers(0, 2000, size=(50, 5)):
+        alloc, prod = m.allocate(*s)
+        numba_alloc, numba_prod = m_numba.allocate(*s)
+        np.testing.assert_array_equal(numba_alloc, alloc)
+        assert numba_prod == prod
+
+
+@pytest.mark.parametrize('state', [(100, 0, 0, 0, 0), (20, 30, 5, 10, 40)])
+def test_numba_simt_bitwise(m, m_numba, state):
+    np.random.seed(11)
+    expected = m.simt(*state, time=200)
+    np.random.seed(11)
+    for x, y in zip(m_numba.simt(*state, time=200), expected):
+        np.testing.assert_array_equal(x, y)
@@ -0,0 +1,38 @@
+"""
+Filename: test_marginal.py
+
+Author: Brian Held
+
+Marginal products of Model.marginal_products and Model.marginal_surface
+
+"""
+import numpy as np
+
+
+def test_marginal_products_equal_central_differences(m):
+    allocs = np.random.default_rng(10).integers(1, 200, size=(50, 10)).astype(float)
+    mp = m.marginal_products(allocs)
+    h = 1e-4
+    for x, row in zip(allocs, mp):
+        for j in range(10):
+            step = np.zeros(10)
+            step[j] = h
+            diff = (m.prod(*(x + step)) - m.prod(*(x - step))) / (2 * h)
+            assert abs(row[j] - diff) <= 1e-6 * max(1, abs(diff))
+
+
+def test_discrete_surface(m):
+    alloc = np.random.default_rng(11).integers(1, 100, size=(25, 10))
+    # 25 rows in chunks of 7, written into out
+    out = np.zeros((25, 10))
+    surface = m.marginal_surface(alloc, discrete=True, chunk_size=7, out=out)
+    assert surface is out
+    for j in range(10):
+        more = alloc.copy()
+        more[:, j] += 1
+        np.testing.assert_array_equal(surface[:, j], m.prod_batch(more) - m.prod_batch(alloc))
+
+
+def test_smooth_surface_equals_marginal_products(m):
+    alloc = np.random.default_rng(12).integers(1, 100, size=(25, 10))
+    np.testing.assert_array_equal(m.marginal_surface(alloc, chunk_size=7), m.marginal_products(alloc))
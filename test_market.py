@@ -0,0 +1,35 @@
+"""
+Filename: test_market.py
+
+Author: Brian Held
+
+Labor market simulation of market.py
+
+"""
+import numpy as np
+import pytest
+
+import market
+
+
+@pytest.fixture(scope='module')
+def states():
+    return np.random.default_rng(8).integers(0, 40, size=(30, 5))
+
+
+def run(m, states, workers):
+    return market.simulate_market(m, states, 20, pool=15, unemployed=10, seed=9, workers=workers, shards=3)
+
+
+def test_workers_conserved(m, states):
+    wkrs, alloc, prod, pool, unemployed = run(m, states, 1)
+    total = np.sum(wkrs, axis=(1, 2)) + pool + unemployed
+    np.testing.assert_array_equal(total, total[0])
+    assert np.all(wkrs >= 0) and np.all(alloc >= 0) and np.all(pool >= 0) and np.all(unemployed >= 0)
+    # every allocated worker exists
+    assert np.all(alloc[..., 0:5] + alloc[..., 5:10] <= wkrs)
+
+
+def test_same_results_for_any_number_of_processes(m, states):
+    for serial, parallel in zip(run(m, states, 1), run(m, states, 2)):
+        np.testing.assert_array_equal(serial, parallel)
@@ -0,0 +1,53 @@
+"""
+Filename: test_policy.py
+
+Author: Brian Held
+
+Policy tables built by policy.build_policy
+
+"""
+import numpy as np
+import pytest
+
+import model
+import policy
+
+
+@pytest.fixture(scope='module')
+def table_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('policy'))
+    policy.build_policy(model.Model(), (6, 3, 3, 3, 6), path, workers=1, chunk_size=100)
+    return path
+
+
+def test_lookup_equals_allocate(m, table_path):
+    table = policy.PolicyTable(table_path, m)
+    states = np.array(np.meshgrid(*[np.arange(b + 1) for b in table.bounds], indexing='ij')).reshape(5, -1).T
+    alloc, prod = table.lookup(states)
+    for s, a, p in zip(states, alloc, prod):
+        expected, expected_prod = m.allocate(*s)
+        np.testing.assert_array_equal(a, expected)
+        assert p == pytest.approx(expected_prod, rel=1e-12, nan_ok=True)
+
+
+def test_use_policy(table_path):
+    m = model.Model()
+    m.use_policy(policy.PolicyTable(table_path, m))
+    reference = model.Model()
+    # inside and outside the bounds of the table
+    for s in [(4, 1, 2, 0, 5), (20, 1, 2, 0, 5)]:
+        np.testing.assert_array_equal(m.allocate(*s)[0], reference.allocate(*s)[0])
+    states = [(4, 1, 2, 0, 5), (20, 1, 2, 0, 5), (0, 3, 3, 3, 0)]
+    np.testing.assert_array_equal(m.allocate_many(states)[0], reference.allocate_many(states)[0])
+    # the table is detached when a parameter changes
+    m.beta = 0.4
+    np.testing.assert_array_equal(m.allocate(4, 1, 2, 0, 5)[0], model.Model(beta=0.4).allocate(4, 1, 2, 0, 5)[0])
+
+
+def test_table_for_other_parameters_rejected(table_path):
+    other = model.Model(beta=0.4)
+    with pytest.raises(ValueError):
+        policy.PolicyTable(table_path, other)
+    table = policy.PolicyTable(table_path, model.Model())
+    with pytest.raises(ValueError):
+        other.use_policy(table)
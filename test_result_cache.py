@@ -0,0 +1,68 @@
+"""
+Filename: test_result_cache.py
+
+Author: Brian Held
+
+On-disk result cache of cache.py
+
+"""
+import os
+import shutil
+
+import numpy as np
+
+import cache
+import model
+
+
+def test_seeded_calls_cached(m, tmp_path):
+    results = cache.ResultCache(str(tmp_path))
+    first = results.call(m, 'simt', 100, 0, 0, 0, 0, time=20, seed=3)
+    second = results.call(m, 'simt', 100, 0, 0, 0, 0, time=20, seed=3)
+    assert len(results.entries()) == 1
+    for x, y in zip(first, second):
+        np.testing.assert_array_equal(x, y)
+    np.random.seed(3)
+    for x, y in zip(first, m.simt(100, 0, 0, 0, 0, time=20)):
+        np.testing.assert_array_equal(x, y)
+
+
+def test_unseeded_simt_not_cached(m, tmp_path):
+    results = cache.ResultCache(str(tmp_path))
+    paths = [results.call(m, 'simt', 100, 0, 0, 0, 0, time=30)[0] for _ in range(5)]
+    assert results.entries() == []
+    assert any(not np.array_equal(paths[0], path) for path in paths[1:])
+
+
+def test_least_recently_used_evicted(tmp_path):
+    results = cache.ResultCache(str(tmp_path), max_bytes=10**9)
+    for i in range(3):
+        results.put('key{}'.format(i), np.full(1000, i, dtype=np.float64))
+    # last used: key1, key0, key2
+    for i, used in enumerate([200, 100, 300]):
+        os.utime(os.path.join(str(tmp_path), 'key{}'.format(i), 'meta.json'), (used, used))
+    entry = results.entries()[0][1]
+    results.max_bytes = 3 * entry
+    results.put('key3', np.full(1000, 3, dtype=np.float64))
+    assert sorted(key for _, _, key in results.entries()) == ['key0', 'key2', 'key3']
+    assert results.size() <= results.max_bytes
+    assert results.get('key1') is None
+    np.testing.assert_array_equal(results.get('key0'), np.zeros(1000))
+
+
+def test_get_after_concurrent_eviction(tmp_path):
+    results = cache.ResultCache(str(tmp_path))
+    results.put('key', (np.arange(5), np.ones(3)))
+    # another process removes the arrays between the reads of meta.json and of the .npy files
+    os.remove(os.path.join(str(tmp_path), 'key', '1.npy'))
+    assert results.get('key') is None
+    shutil.rmtree(os.path.join(str(tmp_path), 'key'))
+    assert results.get('key') is None
+
+
+
+def test_key_depends_on_backend():
+    numpy_model, numba_model = model.Model(), model.Model()
+    numba_model.backend = 'numba'
+    assert cache.result_key(numpy_model, 'allocate', (10, 0, 0, 0, 0)) != \
+        cache.result_key(numba_model, 'allocate', (10, 0, 0, 0, 0))
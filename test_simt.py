@@ -0,0 +1,56 @@
+"""
+Filename: test_simt.py
+
+Author: Brian Held
+
+Model.simt reproduces the original period-by-period simulation and reports runs that do not converge
+
+"""
+import numpy as np
+import pytest
+
+import model
+
+
+def baseline_simt(m, n_new, n_low, n_high, n_neg, n_pos, time=0):
+    # simt before preallocation and simt_iter, appending one period at a time
+    wkrs = [np.array([n_new, n_low, n_high, n_neg, n_pos], dtype=np.int32)]
+    alloc, prod = m.allocate(*wkrs[0])
+    alloc, prod, unemployed = [np.asarray(alloc, dtype=np.int32)], [prod], [0]
+    t = 0
+    while True:
+        t += 1
+        learned = np.random.binomial(alloc[t-1], m.learn, size=10)
+        win1 = np.random.binomial(learned[0:5], m.p1, size=5)
+        chg1 = win1 @ model.WINTRANS1 + (learned[0:5]-win1) @ model.LOSETRANS1
+        win2 = np.random.binomial(learned[5:10], m.p2, size=5)
+        chg2 = win2 @ model.WINTRANS2 + (learned[5:10]-win2) @ model.LOSETRANS2
+        w = (chg1 + chg2 + wkrs[t-1]).astype(np.int32)
+        dead = np.random.binomial(w, model.DEATH, size=5)
+        dead_unemployed = np.random.binomial(unemployed[t-1], model.DEATH)
+        unemployed.append(unemployed[t-1] - np.sum((learned[0:5]-win1) @ model.LOSETRANS1) - dead_unemployed)
+        w -= dead.astype(np.int32)
+        w[0] += np.sum(dead) + dead_unemployed
+        wkrs.append(w)
+        a, p = m.allocate(*w)
+        alloc.append(np.asarray(a, dtype=np.int32))
+        prod.append(p)
+        if t == time or (t > time and sum(np.subtract(wkrs[t], wkrs[t-1])) <= max(5, sum(wkrs[t]) * 0.05)):
+            return np.array(wkrs), np.array(alloc), np.array(prod)
+
+
+@pytest.mark.parametrize('state, time', [((100, 0, 0, 0, 0), 0), ((20, 30, 5, 10, 40), 0),
+                                         ((100, 0, 0, 0, 0), 150)])
+def test_simt_equals_baseline(m, state, time):
+    np.random.seed(7)
+    expected = baseline_simt(m, *state, time=time)
+    np.random.seed(7)
+    for x, y in zip(m.simt(*state, time=time), expected):
+        np.testing.assert_array_equal(x, y)
+
+
+def test_simt_warns_at_max_periods(m, monkeypatch):
+    monkeypatch.setattr(model, 'converged', lambda prev, wkrs: False)
+    with pytest.warns(RuntimeWarning, match='max_periods=30'):
+        wkrs, alloc, prod = m.simt(100, 0, 0, 0, 0, max_periods=30)
+    assert len(prod) == 31
@@ -0,0 +1,52 @@
+"""
+Filename: test_stream.py
+
+Author: Brian Held
+
+Model.simt_iter and the reducers and writers of stream.py
+
+"""
+import numpy as np
+import pytest
+
+import stream
+
+
+@pytest.mark.parametrize('state, time', [((100, 0, 0, 0, 0), 0), ((20, 30, 5, 10, 40), 80)])
+def test_simt_iter_equals_simt(m, state, time):
+    np.random.seed(3)
+    wkrs, alloc, prod = m.simt(*state, time=time)
+    np.random.seed(3)
+    periods = list(m.simt_iter(*state, time=time))
+    assert len(periods) == len(prod)
+    for t, (period, w, a, p) in enumerate(zip(periods, wkrs, alloc, prod)):
+        assert period[0] == t
+        np.testing.assert_array_equal(period[1], w)
+        np.testing.assert_array_equal(period[2], a)
+        assert period[3] == p
+
+
+def test_running_stats(m):
+    np.random.seed(4)
+    wkrs, alloc, prod = m.simt(50, 10, 5, 0, 20, time=200)
+    np.random.seed(4)
+    prod_stats, wkrs_stats = stream.consume(m.simt_iter(50, 10, 5, 0, 20, time=200), stream.RunningStats('prod'),
+                                            stream.RunningStats('wkrs'))
+    assert prod_stats.count == len(prod)
+    assert prod_stats.mean == pytest.approx(np.mean(prod), rel=1e-12)
+    assert prod_stats.var == pytest.approx(np.var(prod), rel=1e-9)
+    np.testing.assert_allclose(wkrs_stats.mean, np.mean(wkrs, axis=0), rtol=1e-12)
+    np.testing.assert_allclose(wkrs_stats.var, np.var(wkrs, axis=0), rtol=1e-9, atol=1e-9)
+
+
+def test_snapshot_round_trip(m, tmp_path):
+    path = str(tmp_path / 'snapshots.bin')
+    np.random.seed(5)
+    periods = list(m.simt_iter(100, 0, 0, 0, 0, time=50))
+    with stream.SnapshotWriter(path, every=5) as writer:
+        stream.consume(periods, writer)
+    for records in (stream.read_snapshots(path), stream.read_snapshots(path, mmap=True)):
+        assert len(records) == 11
+        for record, period in zip(records, periods[::5]):
+            for name, value in zip(stream.FIELDS, period):
+                np.testing.assert_array_equal(record[name], value)
@@ -0,0 +1,23 @@
+"""
+Filename: test_sweep.py
+
+Author: Brian Held
+
+sweep runs the chosen analysis at every grid point
+
+"""
+import numpy as np
+import pytest
+
+import model
+import sweep
+
+
+@pytest.mark.parametrize('method', ['greedy', 'search'])
+def test_sweep_allocate_method(tmp_path, method):
+    state = (3, 0, 1, 0, 2)
+    results = sweep.sweep({'beta': [0.4, 0.6], 'learn': [0.1, 0.3]}, 'allocate', state, str(tmp_path / 'out.npz'),
+                          workers=1, progress=False, method=method)
+    points = sweep.grid_points({'beta': [0.4, 0.6], 'learn': [0.1, 0.3]})
+    for params, alloc in zip(points, results['alloc']):
+        np.testing.assert_array_equal(alloc, model.Model(*params).allocate(*state, method=method)[0])
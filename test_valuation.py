@@ -0,0 +1,65 @@
+"""
+Filename: test_valuation.py
+
+Author: Brian Held
+
+Worker and firm values of valuation.py
+
+"""
+import numpy as np
+import pytest
+
+import model
+import sweep
+import valuation
+
+
+def expected_path(m, alloc, periods):
+    # workers and unemployed of a firm starting with alloc after each period, from the expected step of simt
+    share = valuation.role_share(alloc)[0]
+    x = np.append(np.add(alloc[0:5], alloc[5:10]), 0.0)
+    for _ in range(periods):
+        yield share, x
+        x = m._expected_step(x, share)
+
+
+@pytest.mark.parametrize('params', [(), (0.2, 0.7, 0.1, 1, 0.5, 0.02)])
+def test_firm_value_equals_discounted_output(params):
+    m = model.Model(*params)
+    alloc = m.allocate(1000, 0, 0, 0, 0)[0]
+    delta = 1 / (1 + m.r)
+    series = sum(delta ** t * m.prod_batch(np.concatenate([share * x[0:5], (1 - share) * x[0:5]]))[0]
+                 for t, (share, x) in enumerate(expected_path(m, alloc, 3000)))
+    assert m.value(alloc)[1] == pytest.approx(series, rel=1e-9)
+
+
+def test_worker_values_equal_series(m):
+    alloc = m.allocate(200, 50, 20, 10, 60)[0]
+    share = valuation.role_share(alloc)
+    worker, _ = valuation.transition_matrices(m.learn, m.p1, m.p2, share)
+    mp = m.marginal_products(alloc)
+    flow = np.append(share * mp[:, 0:5] + (1 - share) * mp[:, 5:10], 0.0)
+    delta = 1 / (1 + m.r)
+    series, step = np.zeros(6), np.eye(6)
+    for t in range(3000):
+        series += delta ** t * step @ flow
+        step = step @ worker[0]
+    np.testing.assert_allclose(m.value(alloc)[0], series, rtol=1e-9)
+
+
+def test_firm_matrix_equals_expected_step(m):
+    alloc = m.allocate(200, 50, 20, 10, 60)[0]
+    share = valuation.role_share(alloc)
+    _, firm = valuation.transition_matrices(m.learn, m.p1, m.p2, share)
+    expected = np.array([m._expected_step(x, share[0]) for x in np.eye(6)])
+    np.testing.assert_allclose(firm[0], expected, atol=1e-15)
+
+
+def test_batch_equals_single_points():
+    points = sweep.grid_points({'beta': [0.4, 0.6], 'learn': [0.05, 0.3], 'r': [0.02, 0.05]})
+    alloc = model.Model().allocate(300, 20, 10, 0, 40)[0]
+    worker, firm = valuation.value_batch(points, alloc)
+    for params, w, f in zip(points, worker, firm):
+        single_w, single_f = model.Model(*params).value(alloc)
+        np.testing.assert_allclose(w, single_w, rtol=1e-12)
+        assert f == pytest.approx(single_f, rel=1e-12)
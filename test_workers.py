@@ -0,0 +1,31 @@
+"""
+Filename: test_workers.py
+
+Author: Brian Held
+
+Individual worker simulation of workers.py
+
+"""
+import numpy as np
+
+import workers
+
+
+def test_population_counts(m):
+    population = workers.WorkerPopulation.from_counts(m, [50, 20, 10, 5, 30], n_unemployed=7, rng=0)
+    np.testing.assert_array_equal(population.counts(), [50, 20, 10, 5, 30])
+    assert population.unemployed == 7
+    # beliefs are consistent with the true abilities
+    assert np.all(population.ability[population.belief == 1] == workers.MID)
+    assert np.all(population.ability[population.belief == 2] == workers.HIGH)
+    assert np.all(population.ability[population.belief == 3] != workers.HIGH)
+    assert np.all(population.ability[population.belief == 4] != workers.LOW)
+
+
+def test_mean_counts_match_simt(m):
+    # seeded ensembles of both simulations, mean counts within 4 standard errors after 15 periods
+    n_reps, state = 200, (200, 0, 0, 0, 0)
+    individual = np.array([workers.simulate(m, *state, time=15, seed=[1, i])[0][-1] for i in range(n_reps)])
+    aggregate = m.simt_ensemble(n_reps, *state, time=15, seed=2)[0][:, -1]
+    se = np.sqrt((np.var(individual, axis=0) + np.var(aggregate, axis=0)) / n_reps)
+    assert np.all(np.abs(np.mean(individual, axis=0) - np.mean(aggregate, axis=0)) <= 4 * se + 1e-9)
@@ -0,0 +1,160 @@
+"""
+Filename: valuation.py
+
+Author: Brian Held
+
+Expected discounted value of workers and firms in the learning model of Ch. 2 of my thesis, from the Markov
+chain of a worker's type under a fixed allocation policy, computed directly instead of averaging simt paths
+
+"""
+import numpy as np
+
+import model
+
+# Role 1 share of worker types without workers, the role allocate starts them in (steps 1-3)
+EMPTY_SHARE = np.array([1.0, 1.0, 0.0, 1.0, 0.0])
+
+
+def role_share(alloc):
+    """
+    Share of each worker type assigned to role 1 by allocations (K x 10), K x 5
+    """
+    alloc = np.asarray(alloc, dtype=float).reshape(-1, 10)
+    n = alloc[:, 0:5] + alloc[:, 5:10]
+    return np.where(n > 0, alloc[:, 0:5] / np.maximum(n, 1), EMPTY_SHARE)
+
+
+def transition_matrices(learn, p1, p2, share):
+    """
+    One-period transition matrices of a worker over the worker types and unemployed (index 5)
+
+    Parameters
+    ----------
+    learn  : array_like(float, length K)
+        Arrival rate of ability signals
+    p1, p2 : array_like(float, K x 5)
+        Probabilities of success in each role by worker type
+    share  : array_like(float, K x 5)
+        Share of each worker type assigned to role 1
+
+    Returns
+    -------
+    worker : array_like(float, K x 6 x 6)
+        worker[k, i, j] is the probability that a worker of type i is alive and of type j (or unemployed) one
+        period later. Rows sum to one minus the probability of death.
+    firm : array_like(float, K x 6 x 6)
+        The same with dead workers (and dead unemployed) replaced by new workers, as in simt, so row i is the
+        expected workers and unemployed one period after a firm with one worker of type i
+
+    Notes
+    -----
+    A signal arrives with probability learn and comes from the worker's role. Success and failure move the
+    worker along the rows of WINTRANS and LOSETRANS; failure in the low role releases the worker to the
+    unemployed. Workers die with probability DEATH after the signals, except those released in the same period,
+    following the timing of simt.
+
+    """
+    learn = np.asarray(learn, dtype=float).reshape(-1, 1, 1)
+    p1, p2, share = (np.asarray(x, dtype=float).reshape(-1, 5, 1) for x in (p1, p2, share))
+    eye = np.eye(5)
+    # rows of I + TRANS give the type after each outcome; zero rows leave the firm
+    role1 = p1 * (eye + model.WINTRANS1) + (1 - p1) * (eye + model.LOSETRANS1)
+    role2 = p2 * (eye + model.WINTRANS2) + (1 - p2) * (eye + model.LOSETRANS2)
+    move = (1 - learn) * eye + learn * share * role1 + learn * (1 - share) * role2
+    worker = np.zeros(move.shape[:1] + (6, 6))
+    worker[:, 0:5, 0:5] = (1 - model.DEATH) * move
+    worker[:, 0:5, 5] = 1 - np.sum(move, axis=2)
+    worker[:, 5, 5] = 1 - model.DEATH
+    firm = worker.copy()
+    firm[:, :, 0] += 1 - np.sum(worker, axis=2)
+    return worker, firm
+
+
+def value_batch(points, alloc, tol=1e-10):
+    """
+    Discounted value of each worker type and of the firm for many parameter points, batched over the points
+
+    Parameters
+    ----------
+    points : array_like(float, K x 7)
+        Model parameters of each point, in the order of sweep.PARAMS (see sweep.grid_points)
+    alloc  : array_like(int, length 10 or K x 10)
+        Allocation policy at every point, or one per point: the shares of each worker type in each role, the
+        workers whose marginal products pay each type and the workers the firm starts with
+    tol    : the firm's expected path is followed until its discounted distance from the stationary workers is
+             below tol times the number of workers
+
+    Returns
+    -------
+    worker : array_like(float, K x 6)
+        Expected discounted marginal product of a worker of each type (new, low, high, neg, pos) and of an
+        unemployed worker (0) until death
+    firm : array_like(float, length K)
+        Expected discounted output of a firm starting with the workers of alloc, including the new workers
+        that replace dead workers
+
+    Notes
+    -----
+    A worker of type i employed in the allocation is paid its marginal product in each role
+    (Model.marginal_products), averaged by the share of the type in each role. Values discount at
+    delta = 1 / (1 + r) and count the current period, so worker values solve V = y + delta * P @ V for the
+    worker transition matrix P of transition_matrices, one stacked linear solve for all points.
+
+    The firm's expected workers after t periods are x0 @ F^t for its starting workers x0 and the firm matrix F,
+    which converge to the stationary workers x* (as in Model.steady_state). Its output in each period is prod of
+    these workers split between roles by the shares of the policy (prod_batch, so 0 for an empty role), and
+    the firm value is the discounted sum of these outputs: the periods until x0 @ F^t is within tol of x* are
+    summed and the rest of the sum is delta^T / (1 - delta) * prod(x*). Like steady_state, this is the output of
+    the expected workers rather than the expected output, which differs by the small concavity of prod.
+
+    """
+    points = np.atleast_2d(np.asarray(points, dtype=float))
+    alloc = np.broadcast_to(np.asarray(alloc, dtype=float).reshape(-1, 10), (points.shape[0], 10))
+    gamma_l, gamma_m, gamma_h, a, beta, r, learn = points.T
+    p1, p2 = model.success_probs(gamma_l, gamma_m, gamma_h)
+    v1_inpt, v2_inpt = p1 * (1 - p1), p2 * (1 - p2)
+    share = role_share(alloc)
+    mp = model.marginal_products(a, beta, p1, p2, v1_inpt, v2_inpt, alloc)
+    flow = np.zeros((points.shape[0], 6))
+    flow[:, 0:5] = share * mp[:, 0:5] + (1 - share) * mp[:, 5:10]
+
+    worker, firm = transition_matrices(learn, p1, p2, share)
+    delta = 1 / (1 + r)
+    eye = np.eye(6)
+    values = np.linalg.solve(eye - delta[:, None, None] * worker, flow[:, :, None])[:, :, 0]
+
+    def output(x, rows):
+        # prod of the workers x (one row per point of rows, 6 columns) split between roles by the policy shares
+        roles = np.hstack([share[rows] * x[:, 0:5], (1 - share[rows]) * x[:, 0:5]])
+        return model.production(a[rows], beta[rows], p1[rows], p2[rows], v1_inpt[rows], v2_inpt[rows], roles)
+
+    x = np.zeros((points.shape[0], 6))
+    x[:, 0:5] = alloc[:, 0:5] + alloc[:, 5:10]
+    total = np.sum(x, axis=1)
+    # stationary workers and unemployed of the firm chain with the same total: x* @ (F - I) = 0
+    lhs = np.swapaxes(firm - eye, 1, 2)
+    lhs[:, 5, :] = 1
+    rhs = np.zeros((points.shape[0], 6, 1))
+    rhs[:, 5, 0] = total
+    stationary = np.linalg.solve(lhs, rhs)[:, :, 0]
+
+    # follow the path of each point until it has converged, then add the tail at the stationary workers
+    firm_value, discount = np.zeros(points.shape[0]), np.ones(points.shape[0])
+    rows = np.arange(points.shape[0])
+    while rows.size > 0:
+        active = discount[rows] * np.max(np.abs(x - stationary[rows]), axis=1) > tol * np.maximum(total[rows], 1)
+        rows, x = rows[active], x[active]
+        firm_value[rows] += discount[rows] * output(x, rows)
+        discount[rows] *= delta[rows]
+        x = np.einsum('ki,kij->kj', x, firm[rows])
+    firm_value += discount / (1 - delta) * output(stationary, slice(None))
+    return values, firm_value
+
+
+def value(m, alloc, tol=1e-10):
+    """
+    value_batch for the parameters of Model m: worker values (length 6) and firm value
+    """
+    points = [[m.gam_l, m.gam_m, m.gam_h, m.a, m.beta, m.r, m.learn]]
+    worker, firm = value_batch(points, alloc, tol)
+    return worker[0], firm[0]
@@ -0,0 +1,168 @@
+"""
+Filename: workers.py
+
+Author: Brian Held
+
+Simulation of the learning model at the level of individual workers: every worker's true ability, the firm's
+belief about it (the worker type) and role are held in compact NumPy columns and updated together each period
+
+"""
+import numpy as np
+
+from model import DEATH, LOSETRANS1, LOSETRANS2, WINTRANS1, WINTRANS2, converged
+
+# True ability codes
+LOW, MID, HIGH = 0, 1, 2
+
+# Belief code of unemployed workers (known to be of the lowest ability), next to the worker types 0-4 of Model
+UNEMPLOYED = -1
+
+
+def _next_type(trans):
+    # worker type after a signal for each current type: unchanged for zero rows, the +1 column otherwise, and
+    # UNEMPLOYED for rows where the worker only leaves the firm
+    nxt = np.arange(5, dtype=np.int8)
+    for row in range(5):
+        if trans[row].any():
+            gain = np.flatnonzero(trans[row] > 0)
+            nxt[row] = gain[0] if gain.size else UNEMPLOYED
+    return nxt
+
+
+# Worker type after a positive / negative signal in each role, indexed [role, type]
+WIN_NEXT = np.array([_next_type(WINTRANS1), _next_type(WINTRANS2)])
+LOSE_NEXT = np.array([_next_type(LOSETRANS1), _next_type(LOSETRANS2)])
+
+
+class WorkerPopulation(object):
+    """
+    Struct-of-arrays population of individual workers
+
+    Parameters
+    ----------
+    ability : array_like(int8)
+        True ability of each worker (LOW, MID or HIGH)
+    belief : array_like(int8)
+        Worker type of each worker (0-4 as in Model, or UNEMPLOYED)
+    role : array_like(int8), optional
+        Assigned role of each worker (0 for the low job, 1 for the high job), set by assign
+
+    Notes
+    -----
+    A worker takes 3 bytes, so millions of workers fit in a few MB.
+
+    """
+
+    def __init__(self, ability, belief, role=None):
+        self.ability = np.asarray(ability, dtype=np.int8)
+        self.belief = np.asarray(belief, dtype=np.int8)
+        self.role = np.zeros(len(self.belief), dtype=np.int8) if role is None else np.asarray(role, dtype=np.int8)
+
+    @classmethod
+    def from_counts(cls, model, counts, n_unemployed=0, rng=None):
+        """
+        Population with counts[j] workers of each worker type j and n_unemployed unemployed workers, with true
+        abilities drawn consistently with the beliefs and the population shares of model
+        """
+        rng = np.random.default_rng(rng)
+        counts = np.asarray(counts, dtype=np.int64)
+        belief = np.repeat(np.arange(-1, 5, dtype=np.int8), np.append(n_unemployed, counts))
+        gam = np.array([model.gam_l, model.gam_m, model.gam_h])
+        # distribution of true ability given the belief: new, low, high, neg (not high), pos (not low)
+        given = np.array([[1, 0, 0], gam, [0, 1, 0], [0, 0, 1], gam * [1, 1, 0], gam * [0, 1, 1]])
+        cum = np.cumsum(given / given.sum(axis=1, keepdims=True), axis=1)
+        ability = np.sum(rng.random(len(belief))[:, None] >= cum[belief + 1, :-1], axis=1)
+        return cls(ability, belief)
+
+    def __len__(self):
+        return len(self.belief)
+
+    def counts(self):
+        """
+        Number of workers of each worker type (new, low, high, neg, pos)
+        """
+        return np.bincount(self.belief[self.belief >= 0], minlength=5)
+
+    @property
+    def unemployed(self):
+        return int(np.sum(self.belief == UNEMPLOYED))
+
+    def assign(self, alloc, rng):
+        """
+        Assign roles to match an allocation (length 10) of worker types, picking workers of each type at random
+        """
+        role = np.ones(len(self), dtype=np.int8)
+        for j in range(5):
+            # alloc[j] workers of type j drawn at random take the low job, the rest the high job
+            members = np.flatnonzero(self.belief == j)
+            role[rng.choice(members, size=min(int(alloc[j]), len(members)), replace=False)] = 0
+        self.role = role
+
+    def step(self, model, rng):
+        """
+        Advance one period: signals arrive and update beliefs, then workers die and are replaced by new workers
+        """
+        was_unemployed = self.belief == UNEMPLOYED
+        employed = ~was_unemployed
+        # signals arrive at rate learn; success in the low job needs at least mid ability, in the high job high
+        signal = employed & (rng.random(len(self)) < model.learn)
+        success = self.ability > LOW + self.role
+        belief = np.maximum(self.belief, 0)
+        self.belief = np.where(signal, np.where(success, WIN_NEXT[self.role, belief], LOSE_NEXT[self.role, belief]),
+                               self.belief).astype(np.int8)
+        # deaths among workers after the signals and among those unemployed at the start of the period
+        dead = ((self.belief != UNEMPLOYED) | was_unemployed) & (rng.random(len(self)) < DEATH)
+        n_dead = int(np.sum(dead))
+        gam = np.array([model.gam_l, model.gam_m, model.gam_h])
+        self.ability[dead] = rng.choice(3, size=n_dead, p=gam / gam.sum())
+        self.belief[dead] = 0
+        self.role[dead] = 0
+
+
+def simulate(model, n_new, n_low, n_high, n_neg, n_pos, time=0, seed=None, method='search', max_periods=10000):
+    """
+    Simulate individual workers of a single firm over t periods starting with an initial worker state
+
+    Parameters
+    ----------
+    model  : Model instance
+    n_new, n_low, n_high, n_neg, n_pos, time, max_periods : see Model.simt
+    seed   : seed (or np.random.Generator) of the random draws
+    method : allocation method passed to model.allocate
+
+    Returns
+    -------
+    wkrs : array_like(int, t x 5)
+        State vector of workers (counts of each belief) for each time period
+    alloc : array_like(int, t x 10)
+        Optimal assignment of workers for each time period
+    prod : array_like(float, length t)
+        Output associated with optimal assignment for each time period
+    population : WorkerPopulation
+        Workers at the end of the simulation
+
+    Notes
+    -----
+    Each period the firm allocates the counts of each worker type as in Model.simt and assigns that many
+    workers of each type to each role at random. Signals then resolve against each worker's true ability rather
+    than with type-level probabilities, so aggregated counts follow the same distribution as Model.simt (mean
+    counts are compared in test_workers.py). One difference: allocate puts a placeholder worker in an empty role
+    even when the firm has no worker of that type. simt draws signals for it, while here it is not a worker
+    and receives none.
+
+    """
+    rng = np.random.default_rng(seed)
+    population = WorkerPopulation.from_counts(model, [n_new, n_low, n_high, n_neg, n_pos], rng=rng)
+    wkrs, alloc, prod = [], [], []
+    t = 0
+    while True:
+        wkrs.append(population.counts())
+        a, p = model.allocate(*wkrs[t], method=method)
+        alloc.append(np.asarray(a))
+        prod.append(p)
+        if t == time or (t > time and converged(wkrs[t-1], wkrs[t])) or (time == 0 and t == max_periods):
+            break
+        population.assign(alloc[t], rng)
+        population.step(model, rng)
+        t += 1
+    return np.array(wkrs), np.array(alloc), np.array(prod), population